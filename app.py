@@ -1,27 +1,129 @@
-from flask import Flask, render_template, request, jsonify, session, make_response
+from flask import Flask, render_template, request, jsonify, session, make_response, g, has_app_context, send_from_directory
 from flask_cors import CORS
-import sqlite3
 import json
+import mimetypes
 import os
-from datetime import datetime
-import random
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+import atexit
 import re
-import hashlib
+import secrets
+import threading
+import zlib
+from functools import wraps
+from werkzeug.http import is_resource_modified
+
+from assets import AssetManifest
+from catalog import SORT_KEYS, CatalogCache, decode_cursor, encode_cursor, public_fields
+from chatbot import PRODUCT_TOPICS, Chatbot
+from compression import GzipCompressor
+from db import BatchWriter, ConnectionPool
+from images import ImagePipeline
+from passwords import AuthBusy, PasswordHasher, needs_rehash
+from render_cache import RenderCache
+from retrieval import ProductRetriever
+from user_cache import UserSummaryCache
 
 app = Flask(__name__)
 app.secret_key = 'techstore-secret-key-2024'  # Change this in production
 CORS(app, supports_credentials=True)
 
-DATABASE = 'database.db'
+DATABASE = os.environ.get('DATABASE', 'database.db')
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 8))
+# Seconds the same random deals selection is shared between requests (0 = per request)
+DEALS_BUCKET_SECONDS = int(os.environ.get('DEALS_BUCKET_SECONDS', 0))
+
+# How long browsers may reuse catalog responses before revalidating with ETag
+CATALOG_MAX_AGE = int(os.environ.get('CATALOG_MAX_AGE', 30))
+
+DEFAULT_PAGE_SIZE = 24
+# Largest quantity of one product a cart may hold
+MAX_CART_QUANTITY = 999
+# Category whose listing /api/bootstrap includes when none is given
+DEFAULT_CATEGORY = 'Smartphones'
+MAX_PAGE_SIZE = 100
+
+db_pool = ConnectionPool(DATABASE, size=DB_POOL_SIZE)
+# Resized/WebP copies of product images, built by `python images.py` (and on
+# dev-server start); products gain image_src/image_srcset/image_webp_srcset
+product_images = ImagePipeline(
+    os.path.join(app.static_folder, 'images', 'products'),
+    os.path.join(app.static_folder, 'images', 'cache'),
+    '/static/images/cache/',
+).load()
+catalog = CatalogCache(DATABASE, extras=lambda product: product_images.variants(product['image']))
+# Fingerprinted, precompressed copies of css/js/product images served from
+# /assets/ with immutable caching; templates link them through asset_url().
+# They are built at deploy time by `python assets.py`, workers only load them
+assets = AssetManifest(app.static_folder, os.path.join(app.static_folder, 'dist')).load()
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+# Rendered /product/<id> pages keyed by (id, catalog version, in_wishlist)
+product_pages = RenderCache(maxsize=int(os.environ.get('PRODUCT_PAGE_CACHE_SIZE', 512)))
+# gzip for JSON API responses (see the after_request hooks below)
+response_compressor = GzipCompressor(
+    level=int(os.environ.get('GZIP_LEVEL', 6)),
+    min_size=int(os.environ.get('GZIP_MIN_SIZE', 1024)),
+)
+# Chat logs are written in the background so replies never wait on disk
+chat_log_writer = BatchWriter(
+    DATABASE,
+    'INSERT INTO chatbot_logs (user_id, message, response, timestamp) VALUES (?, ?, ?, ?)',
+    max_queue=int(os.environ.get('CHAT_LOG_QUEUE', 10000)),
+    batch_size=int(os.environ.get('CHAT_LOG_BATCH', 100)),
+    flush_interval=float(os.environ.get('CHAT_LOG_FLUSH_SECONDS', 1.0)),
+    policy=os.environ.get('CHAT_LOG_POLICY', 'drop'),
+)
+atexit.register(chat_log_writer.close)
+
+# Reloads CHATBOT_RULES_FILE (if set) when it changes on disk
+chatbot_rules = Chatbot(rules_file=os.environ.get('CHATBOT_RULES_FILE'))
+# In-memory BM25 index over the catalog snapshot for product questions
+product_retriever = ProductRetriever(catalog)
+# Answers /api/auth/check without SQLite; mutations below invalidate entries
+user_summaries = UserSummaryCache(
+    maxsize=int(os.environ.get('USER_CACHE_SIZE', 10000)),
+    ttl=float(os.environ.get('USER_CACHE_TTL', 30)),
+)
+
+# Per-user reads for /api/bootstrap run side by side on pooled connections
+BOOTSTRAP_WORKERS = int(os.environ.get('BOOTSTRAP_WORKERS', 4))
+_bootstrap_executor = None
+_bootstrap_pid = None
+_bootstrap_lock = threading.Lock()
+
+def bootstrap_executor():
+    """Thread pool for /api/bootstrap reads; threads do not survive fork(), so one per process"""
+    global _bootstrap_executor, _bootstrap_pid
+    with _bootstrap_lock:
+        if _bootstrap_executor is None or _bootstrap_pid != os.getpid():
+            _bootstrap_pid = os.getpid()
+            _bootstrap_executor = ThreadPoolExecutor(BOOTSTRAP_WORKERS, thread_name_prefix='bootstrap')
+        return _bootstrap_executor
 
 def get_db_connection():
-    conn = sqlite3.connect(DATABASE)
-    conn.row_factory = sqlite3.Row
+    """Check out a pooled connection; conn.close() returns it to the pool"""
+    conn = db_pool.acquire()
+    if has_app_context():
+        # Released in teardown even if a handler forgets to close it
+        g.setdefault('db_connections', []).append((conn, conn.lease))
     return conn
 
-def hash_password(password):
-    """Simple password hashing"""
-    return hashlib.sha256(password.encode()).hexdigest()
+@app.teardown_appcontext
+def release_db_connections(exception):
+    for conn, lease in g.pop('db_connections', []):
+        db_pool.release(conn, lease)
+
+# Password hashing runs on its own bounded pool so login bursts cannot
+# starve the request workers serving the catalog
+password_hasher = PasswordHasher(
+    workers=int(os.environ.get('AUTH_WORKERS', 2)),
+    max_pending=int(os.environ.get('AUTH_MAX_PENDING', 16)),
+)
+
+def auth_busy_response(error):
+    response = jsonify({'error': str(error)})
+    response.headers['Retry-After'] = '1'
+    return response, 503
 
 def init_db():
     """Initialize database if not exists"""
@@ -30,6 +132,49 @@ def init_db():
         return False
     return True
 
+def json_body_response(body, status=200):
+    """Response for an already-serialized JSON body"""
+    return app.response_class(body, status=status, mimetype='application/json')
+
+def catalog_conditional(view):
+    """ETag/Last-Modified for responses that depend only on the catalog.
+
+    The ETag is the catalog generation plus a hash of the URL, so a matching
+    If-None-Match is answered with 304 before the view runs.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if wants_wishlist_flags():
+            # Per-user body: must not be shared or revalidated by catalog version
+            response = make_response(view(*args, **kwargs))
+            response.cache_control.private = True
+            response.cache_control.no_cache = True
+            return response
+        
+        snapshot = catalog.snapshot()
+        etag = f'{snapshot.version}-{zlib.crc32(request.full_path.encode()):08x}'
+        
+        if not is_resource_modified(request.environ, etag=etag, last_modified=snapshot.last_modified):
+            # JSON like the 200 it stands for, so the gzip hook sets the same ETag and Vary
+            response = app.response_class(status=304, mimetype='application/json')
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+        
+        response.set_etag(etag)
+        response.last_modified = snapshot.last_modified
+        response.cache_control.public = True
+        response.cache_control.max_age = CATALOG_MAX_AGE
+        return response
+    return wrapper
+
+def get_user_counts(cursor, user_id):
+    """(cart_count, wishlist_count) from the trigger-maintained user_stats row"""
+    cursor.execute('SELECT cart_count, wishlist_count FROM user_stats WHERE user_id = ?', (user_id,))
+    row = cursor.fetchone()
+    return (row['cart_count'], row['wishlist_count']) if row else (0, 0)
+
 # Auth helper functions
 def is_logged_in():
     return 'user_id' in session
@@ -37,50 +182,82 @@ def is_logged_in():
 def get_user_id():
     return session.get('user_id')
 
+def wants_wishlist_flags():
+    """Listing requests opt in to per-user in_wishlist flags with ?wishlist=1"""
+    return request.args.get('wishlist') == '1'
+
+def load_wishlist_ids(user_id):
+    """Set of product ids in a user's wishlist"""
+    conn = get_db_connection()
+    try:
+        rows = conn.execute('SELECT product_id FROM wishlist WHERE user_id = ?', (user_id,)).fetchall()
+    finally:
+        # Also runs on bootstrap threads, where no teardown releases it
+        conn.close()
+    return {row['product_id'] for row in rows}
+
+def get_wishlist_ids():
+    """Set of product ids in the current user's wishlist if the request asked
+    for in_wishlist flags (empty for guests), else None. One query per request."""
+    if not wants_wishlist_flags():
+        return None
+    if 'wishlist_ids' not in g:
+        g.wishlist_ids = load_wishlist_ids(get_user_id()) if is_logged_in() else set()
+    return g.wishlist_ids
+
+def load_user_summary(user_id):
+    """Profile fields plus cart/wishlist counts, through user_summaries (None if the user is gone)"""
+    summary = user_summaries.get(user_id)
+    if summary is not None:
+        return summary
+    
+    # Taken before the read so an invalidation racing with it is not undone
+    version = user_summaries.version(user_id)
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT full_name, email, phone, address, pincode FROM users WHERE id = ?', 
+                      (user_id,))
+        user = cursor.fetchone()
+        
+        if user:
+            # Get cart and wishlist counts
+            cart_count, wishlist_count = get_user_counts(cursor, user_id)
+            
+            summary = {
+                'user': {
+                    'name': user['full_name'],
+                    'email': user['email'],
+                    'phone': user['phone'],
+                    'address': user['address'],
+                    'pincode': user['pincode']
+                },
+                'cart_count': cart_count,
+                'wishlist_count': wishlist_count
+            }
+            user_summaries.set(user_id, summary, version)
+    finally:
+        # Also runs on bootstrap threads, where no teardown releases it
+        conn.close()
+    return summary
+
 # Routes
 @app.route('/')
 def index():
     """Home page - shows only required sections"""
     return render_template('index.html')
 
-@app.route('/product/<int:product_id>')
-def product_details(product_id):
-    """Product details page with template rendering"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Get product details - FIXED: Use correct field names
-    cursor.execute('SELECT * FROM products WHERE id = ?', (product_id,))
-    product_row = cursor.fetchone()
-    
-    if not product_row:
-        conn.close()
-        return render_template('index.html', product=None)
-    
-    # Convert row to dict
-    product = dict(product_row)
-    
-    # Parse specs JSON
-    product['specs'] = json.loads(product['specs']) if product.get('specs') else {}
-    
-    # Check if product is in user's wishlist (if logged in)
-    product['in_wishlist'] = False
-    if is_logged_in():
-        user_id = get_user_id()
-        cursor.execute('SELECT id FROM wishlist WHERE user_id = ? AND product_id = ?', 
-                      (user_id, product_id))
-        if cursor.fetchone():
-            product['in_wishlist'] = True
+def product_page_context(cached):
+    """Template fields for a product page, derived from the cached catalog entry"""
+    # Copy the shared catalog entry before adding page-specific fields
+    product = dict(cached)
     
     # Set additional fields expected by template - FIXED: Use correct field mapping
     product['title'] = product['name']  # HTML expects 'title' but we have 'name'
     
     # FIXED: Handle image field properly - check multiple possible field names
-    image_field = None
-    if product.get('image'):
-        image_field = product['image']
-    elif product.get('image_filename'):
-        image_field = product['image_filename']
+    image_field = product.get('image') or product.get('image_filename')
     
     # Set image path
     if image_field:
@@ -98,123 +275,233 @@ def product_details(product_id):
     # For additional images, you can add them if you have them in your database
     product['additional_images'] = []
     
-    conn.close()
+    app.logger.debug('Rendering product page: id=%s name=%s image=%s',
+                     product['id'], product['name'], image_field)
+    return product
+
+@app.route('/product/<int:product_id>')
+def product_details(product_id):
+    """Product details page, rendered once per catalog version and wishlist state"""
+    snapshot = catalog.snapshot()
+    cached = snapshot.by_id.get(product_id)
     
-    # DEBUG: Print product data
-    print(f"PRODUCT DETAILS: ID={product_id}, Name={product['name']}, Image={image_field}")
+    if not cached:
+        return render_template('index.html', product=None)
     
-    # Render template with product data
-    return render_template('index.html', product=product)
+    # The only per-user part of the page: one lookup on the UNIQUE index
+    in_wishlist = False
+    if is_logged_in():
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT 1 FROM wishlist WHERE user_id = ? AND product_id = ?', 
+                      (get_user_id(), product_id))
+        in_wishlist = cursor.fetchone() is not None
+        conn.close()
+    
+    def render():
+        product = product_page_context(cached)
+        product['in_wishlist'] = in_wishlist
+        return render_template('index.html', product=product)
+    
+    # Templates and assets reload in debug mode, so skip the cache there
+    if app.debug:
+        return render()
+    return product_pages.get_or_render((product_id, snapshot.version, in_wishlist), render)
 
-@app.route('/api/products')
-def get_all_products():
-    """Get all products - MISSING ENDPOINT"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+def paginated_listing(category=None):
+    """Keyset page of a listing; DEFAULT_PAGE_SIZE products in id order unless limit/after/sort say otherwise"""
+    wishlist_ids = get_wishlist_ids()
+    sort = request.args.get('sort', 'id')
+    if sort not in SORT_KEYS:
+        return jsonify({'error': f"sort must be one of: {', '.join(SORT_KEYS)}"}), 400
     
-    cursor.execute('SELECT * FROM products')
-    products = cursor.fetchall()
+    try:
+        limit = int(request.args.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
     
-    result = []
-    for product in products:
-        product_dict = dict(product)
-        product_dict['specs'] = json.loads(product_dict['specs'])
-        result.append(product_dict)
+    try:
+        body = catalog.page_json(category, sort, limit, request.args.get('after'), wishlist_ids)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    conn.close()
-    return jsonify(result)
+    return json_body_response(body)
+
+@app.route('/api/products')
+@catalog_conditional
+def get_all_products():
+    """Get a page of all products, paged with ?limit=&after=&sort= (?wishlist=1 adds in_wishlist)"""
+    return paginated_listing()
 
 @app.route('/api/deals')
 def get_deals():
-    """Get 10 mixed products on sale"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    # Get 10 random products that are on sale
-    cursor.execute('''
-        SELECT * FROM products 
-        WHERE on_sale = 1 
-        ORDER BY RANDOM() 
-        LIMIT 10
-    ''')
-    
-    products = cursor.fetchall()
-    result = []
-    
-    for product in products:
-        product_dict = dict(product)
-        # Parse JSON specs
-        product_dict['specs'] = json.loads(product_dict['specs'])
-        result.append(product_dict)
-    
-    conn.close()
-    return jsonify(result)
+    """Get 10 mixed products on sale (?wishlist=1 adds in_wishlist flags)"""
+    wishlist_ids = get_wishlist_ids()
+    body, max_age = catalog.deals_json(10, DEALS_BUCKET_SECONDS, wishlist_ids)
+    response = json_body_response(body)
+    if wishlist_ids is not None:
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+    elif max_age:
+        response.headers['Cache-Control'] = f'public, max-age={max_age}'
+    return response
 
 @app.route('/api/products/category/<category>')
+@catalog_conditional
 def get_products_by_category(category):
-    """Get all products by category"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT * FROM products WHERE category = ?', (category,))
-    products = cursor.fetchall()
-    
-    result = []
-    for product in products:
-        product_dict = dict(product)
-        product_dict['specs'] = json.loads(product_dict['specs'])
-        result.append(product_dict)
-    
-    conn.close()
-    return jsonify(result)
+    """Get a page of products by category, paged with ?limit=&after=&sort= (?wishlist=1 adds in_wishlist)"""
+    return paginated_listing(category)
 
 @app.route('/api/products/<int:product_id>')
+@catalog_conditional
 def get_product(product_id):
     """Get single product details for API (used by JavaScript)"""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT * FROM products WHERE id = ?', (product_id,))
-    product = cursor.fetchone()
+    product = catalog.product_json(product_id)
     
     if product:
-        product_dict = dict(product)
-        product_dict['specs'] = json.loads(product_dict['specs'])
-        conn.close()
-        return jsonify(product_dict)
+        return json_body_response(product)
     
-    conn.close()
     return jsonify({'error': 'Product not found'}), 404
 
+@app.route('/api/bootstrap')
+def bootstrap():
+    """Everything the home page needs on first load in one response: auth state
+    with cart/wishlist counts, wishlist ids, deals and the first page of one
+    category (?category=, default Smartphones) with its next_cursor; for
+    logged-in users the listings carry in_wishlist flags"""
+    category = request.args.get('category') or DEFAULT_CATEGORY
+    user_id = get_user_id()
+    
+    summary = wishlist_ids = None
+    if user_id is not None:
+        # The two per-user queries run concurrently on their own pooled
+        # connections while this thread refreshes the catalog snapshot
+        executor = bootstrap_executor()
+        summary_future = executor.submit(load_user_summary, user_id)
+        wishlist_future = executor.submit(load_wishlist_ids, user_id)
+        catalog.snapshot()
+        summary = summary_future.result()
+        wishlist_ids = wishlist_future.result()
+    
+    if summary:
+        auth = {'logged_in': True, **summary}
+    else:
+        # Guests get the shared unflagged listings (no per-product splicing)
+        auth = {'logged_in': False}
+        wishlist_ids = None
+    
+    # The listings are already-serialized catalog fragments; splice them in as
+    # bytes. The page body's fields ("next_cursor", "products") go in unwrapped
+    deals, _ = catalog.deals_json(10, DEALS_BUCKET_SECONDS, wishlist_ids)
+    page = catalog.page_json(category, 'id', DEFAULT_PAGE_SIZE, None, wishlist_ids)
+    body = b''.join((
+        b'{"auth":', json.dumps(auth, sort_keys=True, separators=(',', ':')).encode(),
+        b',"wishlist_ids":', json.dumps(sorted(wishlist_ids or ()), separators=(',', ':')).encode(),
+        b',"deals":', deals,
+        b',"category":', json.dumps(category).encode(),
+        b',', page[1:-1],
+        b'}',
+    ))
+    
+    response = json_body_response(body)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+@app.route('/api/stats')
+def stats():
+    """Cache hit/miss counters, background writer activity and compression savings"""
+    return jsonify({
+        'catalog': catalog.stats(),
+        'user_summaries': user_summaries.stats(),
+        'chat_logs': chat_log_writer.stats(),
+        'product_pages': product_pages.stats(),
+        'compression': response_compressor.stats()
+    })
+
+# Search returns SEARCH_LIMIT products ranked from at most SEARCH_CANDIDATES
+# matches: a broad substring ("phone") matches tens of thousands of rows, and
+# ranking them all (bm25 has to count every match) costs tens of ms
+SEARCH_LIMIT = 20
+SEARCH_CANDIDATES = 500
+# Ranking weights of the columns that contain every search word
+SEARCH_WEIGHTS = (('name', 10), ('category', 5), ('description', 2))
+SEARCH_SQL = 'SELECT rowid FROM products_fts WHERE products_fts MATCH ? LIMIT ?'
+# Queries with no word long enough for the trigram index scan like before it
+SHORT_SEARCH_SQL = '''
+    SELECT id FROM products
+    WHERE name LIKE ? OR category LIKE ? OR description LIKE ?
+    LIMIT ?
+'''
+SNIPPET_SQL = '''
+    SELECT rowid, snippet(products_fts, -1, '<mark>', '</mark>', '…', 32)
+    FROM products_fts
+    WHERE products_fts MATCH ? AND rowid IN ({})
+'''
+
+def fts_query(query):
+    """Turn free text into an FTS5 trigram query: every word of 3+ characters
+    must occur somewhere, inside a word too (like LIKE '%word%')"""
+    return ' '.join(f'"{word}"' for word in re.findall(r'\w+', query.lower()) if len(word) >= 3)
+
+def rank_search_hits(products, words):
+    """Candidates holding every word (short ones included), best first: column
+    weights, then the shorter, more specific name"""
+    ranked = []
+    for product in products:
+        columns = [(product[column] or '').lower() for column, _ in SEARCH_WEIGHTS]
+        text = ' '.join(columns)
+        missing = [word for word in words if word not in text]
+        if missing:
+            specs = json.dumps(product['specs']).lower()
+            if not all(word in specs for word in missing):
+                continue
+        score = sum(weight for (_, weight), value in zip(SEARCH_WEIGHTS, columns)
+                    if all(word in value for word in words))
+        ranked.append((-score, len(product['name']), product['id'], product))
+    ranked.sort(key=lambda hit: hit[:3])
+    return [hit[3] for hit in ranked]
+
+def search_catalog(cursor, query, limit=SEARCH_LIMIT):
+    """Products matching every word of the query, best first, each with a snippet"""
+    words = re.findall(r'\w+', query.lower())
+    match = fts_query(query)
+    if match:
+        cursor.execute(SEARCH_SQL, (match, SEARCH_CANDIDATES))
+    elif words:
+        term = f'%{query.strip()}%'
+        cursor.execute(SHORT_SEARCH_SQL, (term, term, term, SEARCH_CANDIDATES))
+    else:
+        return []
+    
+    snapshot = catalog.snapshot()
+    candidates = [snapshot.by_id[row[0]] for row in cursor.fetchall() if row[0] in snapshot.by_id]
+    hits = rank_search_hits(candidates, words)[:limit]
+    
+    snippets = {}
+    if match and hits:
+        cursor.execute(SNIPPET_SQL.format(', '.join('?' * len(hits))),
+                       (match, *(product['id'] for product in hits)))
+        snippets = dict(cursor.fetchall())
+    # public_fields copies the shared snapshot dict before fields are added
+    return [dict(public_fields(product), snippet=snippets.get(product['id'])) for product in hits]
+
 @app.route('/api/products/search')
+@catalog_conditional
 def search_products():
-    """Search products by name, category, or description"""
+    """Search products by name, category, description or specs (substring match over an FTS5 trigram index)"""
     query = request.args.get('q', '')
     
-    if not query:
-        return jsonify([])
-    
     conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    search_term = f'%{query}%'
-    cursor.execute('''
-        SELECT * FROM products 
-        WHERE name LIKE ? 
-        OR category LIKE ? 
-        OR description LIKE ?
-        LIMIT 20
-    ''', (search_term, search_term, search_term))
+    result = search_catalog(conn.cursor(), query)
+    conn.close()
     
-    products = cursor.fetchall()
-    result = []
+    wishlist_ids = get_wishlist_ids()
+    if wishlist_ids is not None:
+        for product in result:
+            product['in_wishlist'] = product['id'] in wishlist_ids
     
-    for product in products:
-        product_dict = dict(product)
-        product_dict['specs'] = json.loads(product_dict['specs'])
-        result.append(product_dict)
-    
-    conn.close()
     return jsonify(result)
 
 # User Authentication
@@ -245,6 +532,9 @@ def register():
         if not re.match(r'^\d{6}$', str(data['pincode'])):
             return jsonify({'error': 'Pincode must be 6 digits'}), 400
         
+        # Hash before checking out a connection so it is not held during the KDF
+        hashed_password = password_hasher.hash(data['password'])
+        
         conn = get_db_connection()
         cursor = conn.cursor()
         
@@ -257,7 +547,6 @@ def register():
                 return jsonify({'error': 'Email or phone already registered'}), 400
             
             # Create user with hashed password
-            hashed_password = hash_password(data['password'])
             cursor.execute('''
                 INSERT INTO users (full_name, email, phone, address, pincode, password)
                 VALUES (?, ?, ?, ?, ?, ?)
@@ -272,12 +561,8 @@ def register():
             session['user_name'] = data['full_name']
             session['user_email'] = data['email']
             
-            # Get initial counts
-            cursor.execute('SELECT COUNT(*) as count FROM cart WHERE user_id = ?', (user_id,))
-            cart_count = cursor.fetchone()['count']
-            
-            cursor.execute('SELECT COUNT(*) as count FROM wishlist WHERE user_id = ?', (user_id,))
-            wishlist_count = cursor.fetchone()['count']
+            # Get cart and wishlist counts
+            cart_count, wishlist_count = get_user_counts(cursor, user_id)
             
             conn.close()
             
@@ -304,6 +589,8 @@ def register():
             print(f"Database error: {str(e)}")
             return jsonify({'error': f'Database error: {str(e)}'}), 500
         
+    except AuthBusy as e:
+        return auth_busy_response(e)
     except Exception as e:
         print(f"Registration error: {str(e)}")
         return jsonify({'error': f'Server error: {str(e)}'}), 500
@@ -334,21 +621,34 @@ def login():
         
         user = cursor.fetchone()
         
+        # Release the connection while the slow password check runs
+        conn.close()
+        
         if user:
             # Verify password
-            hashed_password = hash_password(password)
-            if user['password'] == hashed_password:
+            if password_hasher.verify(user['password'], password):
+                # Upgrade legacy SHA-256 or outdated scrypt hashes on login;
+                # hash before taking a connection so no pool slot waits on scrypt
+                new_hash = password_hasher.hash(password) if needs_rehash(user['password']) else None
+                
+                conn = get_db_connection()
+                cursor = conn.cursor()
+                
+                if new_hash:
+                    cursor.execute('UPDATE users SET password = ? WHERE id = ?',
+                                  (new_hash, user['id']))
+                    conn.commit()
+                
+                # Start from fresh data for this user
+                user_summaries.invalidate(user['id'])
+                
                 # Set session
                 session['user_id'] = user['id']
                 session['user_name'] = user['full_name']
                 session['user_email'] = user['email']
                 
                 # Get cart and wishlist counts
-                cursor.execute('SELECT COUNT(*) as count FROM cart WHERE user_id = ?', (user['id'],))
-                cart_count = cursor.fetchone()['count']
-                
-                cursor.execute('SELECT COUNT(*) as count FROM wishlist WHERE user_id = ?', (user['id'],))
-                wishlist_count = cursor.fetchone()['count']
+                cart_count, wishlist_count = get_user_counts(cursor, user['id'])
                 
                 conn.close()
                 
@@ -367,9 +667,10 @@ def login():
                     'wishlist_count': wishlist_count
                 })
         
-        conn.close()
         return jsonify({'error': 'Invalid credentials'}), 401
         
+    except AuthBusy as e:
+        return auth_busy_response(e)
     except Exception as e:
         print(f"Login error: {str(e)}")
         return jsonify({'error': f'Server error: {str(e)}'}), 500
@@ -384,37 +685,9 @@ def logout():
 def check_auth():
     """Check if user is logged in"""
     if is_logged_in():
-        user_id = get_user_id()
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT full_name, email, phone, address, pincode FROM users WHERE id = ?', 
-                      (user_id,))
-        user = cursor.fetchone()
-        
-        if user:
-            # Get counts
-            cursor.execute('SELECT COUNT(*) as count FROM cart WHERE user_id = ?', (user_id,))
-            cart_count = cursor.fetchone()['count']
-            
-            cursor.execute('SELECT COUNT(*) as count FROM wishlist WHERE user_id = ?', (user_id,))
-            wishlist_count = cursor.fetchone()['count']
-            
-            conn.close()
-            
-            return jsonify({
-                'logged_in': True,
-                'user': {
-                    'name': user['full_name'],
-                    'email': user['email'],
-                    'phone': user['phone'],
-                    'address': user['address'],
-                    'pincode': user['pincode']
-                },
-                'cart_count': cart_count,
-                'wishlist_count': wishlist_count
-            })
-        conn.close()
+        summary = load_user_summary(get_user_id())
+        if summary:
+            return jsonify({'logged_in': True, **summary})
     
     return jsonify({'logged_in': False})
 
@@ -445,6 +718,7 @@ def update_profile():
         ))
         
         conn.commit()
+        user_summaries.invalidate(user_id)
         
         # Get updated user
         cursor.execute('SELECT full_name, email, phone, address, pincode FROM users WHERE id = ?', (user_id,))
@@ -467,31 +741,37 @@ def update_profile():
         return jsonify({'error': str(e)}), 500
 
 # Cart Management
-@app.route('/api/cart')
-def get_cart():
-    """Get user's cart items"""
-    if not is_logged_in():
-        return jsonify([])
-    
-    user_id = get_user_id()
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
+def get_cart_summary(cursor, user_id):
+    """Cart items with parsed specs, subtotal and item count"""
+    # Product columns first so 'id' is the product id the frontend acts on
     cursor.execute('''
-        SELECT c.id, c.quantity, p.*
+        SELECT p.*, c.quantity
         FROM cart c
         JOIN products p ON c.product_id = p.id
         WHERE c.user_id = ?
     ''', (user_id,))
     
-    cart_items = cursor.fetchall()
     result = []
-    
-    for item in cart_items:
+    for item in cursor.fetchall():
         item_dict = dict(item)
         item_dict['specs'] = json.loads(item_dict['specs'])
         result.append(item_dict)
     
+    total = sum(item['price'] * item['quantity'] for item in result)
+    return result, total, len(result)
+
+@app.route('/api/cart')
+def get_cart():
+    """Get user's cart items"""
+    if not is_logged_in():
+        return jsonify([])
+    
+    user_id = get_user_id()
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    result, _, _ = get_cart_summary(cursor, user_id)
+    
     conn.close()
     return jsonify(result)
 
@@ -507,39 +787,30 @@ def add_to_cart(product_id):
     
     try:
         # Check if product exists
-        cursor.execute('SELECT id FROM products WHERE id = ?', (product_id,))
-        if not cursor.fetchone():
+        if not catalog.get(product_id):
             conn.close()
             return jsonify({'error': 'Product not found'}), 404
         
-        # Check if already in cart
-        cursor.execute('SELECT id, quantity FROM cart WHERE user_id = ? AND product_id = ?', 
-                      (user_id, product_id))
-        existing = cursor.fetchone()
-        
-        if existing:
-            # Update quantity
-            cursor.execute('''
-                UPDATE cart SET quantity = quantity + 1 
-                WHERE id = ?
-            ''', (existing['id'],))
-        else:
-            # Add new item
-            cursor.execute('''
-                INSERT INTO cart (user_id, product_id, quantity) 
-                VALUES (?, ?, 1)
-            ''', (user_id, product_id))
+        # Add new item or bump the quantity of an existing one in one statement
+        cursor.execute('''
+            INSERT INTO cart (user_id, product_id, quantity) 
+            VALUES (?, ?, 1)
+            ON CONFLICT (user_id, product_id) DO UPDATE SET quantity = quantity + 1
+            RETURNING quantity
+        ''', (user_id, product_id))
+        quantity = cursor.fetchone()['quantity']
         
         conn.commit()
+        user_summaries.invalidate(user_id)
         
         # Get new count
-        cursor.execute('SELECT COUNT(*) as count FROM cart WHERE user_id = ?', (user_id,))
-        count = cursor.fetchone()['count']
+        count, _ = get_user_counts(cursor, user_id)
         
         conn.close()
         return jsonify({
             'success': True,
             'message': 'Added to cart',
+            'quantity': quantity,
             'cart_count': count
         })
         
@@ -562,48 +833,35 @@ def update_cart_quantity(product_id):
         if not data or 'quantity' not in data:
             return jsonify({'error': 'Quantity is required'}), 400
         
-        quantity = int(data['quantity'])
+        try:
+            quantity = int(data['quantity'])
+        except (TypeError, ValueError):
+            return jsonify({'error': 'Quantity must be an integer'}), 400
+        if quantity > MAX_CART_QUANTITY:
+            return jsonify({'error': f'Quantity must be at most {MAX_CART_QUANTITY}'}), 400
         if quantity < 1:
-            # If quantity is 0 or less, remove the item
+            # If quantity is 0 or less, remove the item; hand our connection
+            # back first so one request never holds two pool slots
+            conn.close()
             return remove_from_cart(product_id)
         
-        # Check if item exists in cart
-        cursor.execute('SELECT id FROM cart WHERE user_id = ? AND product_id = ?', 
-                      (user_id, product_id))
+        # Update quantity; no returned row means the item is not in the cart
+        cursor.execute('UPDATE cart SET quantity = ? WHERE user_id = ? AND product_id = ? RETURNING id', 
+                      (quantity, user_id, product_id))
         
-        item = cursor.fetchone()
-        if not item:
+        if not cursor.fetchone():
+            conn.rollback()
             conn.close()
             return jsonify({'error': 'Item not found in cart'}), 404
         
-        # Update quantity
-        cursor.execute('UPDATE cart SET quantity = ? WHERE id = ?', 
-                      (quantity, item['id']))
-        
         conn.commit()
+        user_summaries.invalidate(user_id)
         
         # Get updated cart
-        cursor.execute('''
-            SELECT c.id, c.quantity, p.*
-            FROM cart c
-            JOIN products p ON c.product_id = p.id
-            WHERE c.user_id = ?
-        ''', (user_id,))
-        
-        cart_items = cursor.fetchall()
-        result = []
-        
-        for item in cart_items:
-            item_dict = dict(item)
-            item_dict['specs'] = json.loads(item_dict['specs'])
-            result.append(item_dict)
-        
-        # Calculate total
-        total = sum(item['price'] * item['quantity'] for item in result)
+        result, total, _ = get_cart_summary(cursor, user_id)
         
         # Get cart count
-        cursor.execute('SELECT COUNT(*) as count FROM cart WHERE user_id = ?', (user_id,))
-        count = cursor.fetchone()['count']
+        count, _ = get_user_counts(cursor, user_id)
         
         conn.close()
         
@@ -630,54 +888,116 @@ def remove_from_cart(product_id):
     cursor = conn.cursor()
     
     try:
-        # Check if item exists in cart
-        cursor.execute('SELECT id FROM cart WHERE user_id = ? AND product_id = ?', 
+        # Remove from cart; no returned row means it was not there
+        cursor.execute('DELETE FROM cart WHERE user_id = ? AND product_id = ? RETURNING id', 
                       (user_id, product_id))
         
         if not cursor.fetchone():
+            conn.rollback()
             conn.close()
             return jsonify({'error': 'Item not found in cart'}), 404
         
-        # Remove from cart
-        cursor.execute('DELETE FROM cart WHERE user_id = ? AND product_id = ?', 
-                      (user_id, product_id))
-        
         conn.commit()
+        user_summaries.invalidate(user_id)
         
         # Get updated cart
-        cursor.execute('''
-            SELECT c.id, c.quantity, p.*
-            FROM cart c
-            JOIN products p ON c.product_id = p.id
-            WHERE c.user_id = ?
-        ''', (user_id,))
+        result, total, _ = get_cart_summary(cursor, user_id)
         
-        cart_items = cursor.fetchall()
-        result = []
+        # Get new count
+        count, _ = get_user_counts(cursor, user_id)
         
-        for item in cart_items:
-            item_dict = dict(item)
-            item_dict['specs'] = json.loads(item_dict['specs'])
-            result.append(item_dict)
+        conn.close()
         
-        # Calculate total
-        total = sum(item['price'] * item['quantity'] for item in result)
+        return jsonify({
+            'success': True,
+            'message': 'Removed from cart',
+            'cart_items': result,
+            'cart_total': total,
+            'cart_count': count
+        })
         
-        # Get new count
-        cursor.execute('SELECT COUNT(*) as count FROM cart WHERE user_id = ?', (user_id,))
-        count = cursor.fetchone()['count']
+    except Exception as e:
+        conn.close()
+        return jsonify({'error': str(e)}), 500
+
+CART_BATCH_OPERATIONS = ('add', 'set', 'remove')
+MAX_CART_BATCH_SIZE = 50
+
+@app.route('/api/cart/batch', methods=['POST'])
+def cart_batch():
+    """Apply several cart operations in one transaction.
+    
+    Body: {"operations": [{"op": "add" | "set" | "remove", "product_id": 1, "quantity": 2}]}
+    "add" increments by quantity (default 1), "set" upserts the quantity
+    (removing the item when it is below 1) and "remove" deletes the item.
+    Either every operation is applied or none is.
+    """
+    if not is_logged_in():
+        return jsonify({'error': 'Please login first'}), 401
+    
+    data = request.get_json(silent=True) or {}
+    operations = data.get('operations')
+    if not isinstance(operations, list) or not operations:
+        return jsonify({'error': 'operations must be a non-empty list'}), 400
+    if len(operations) > MAX_CART_BATCH_SIZE:
+        return jsonify({'error': f'At most {MAX_CART_BATCH_SIZE} operations per batch'}), 400
+    
+    # Validate everything up front so a bad entry never leaves a partial batch
+    parsed = []
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict) or operation.get('op') not in CART_BATCH_OPERATIONS:
+            return jsonify({'error': f'Operation {index}: op must be one of add, set, remove'}), 400
+        try:
+            product_id = int(operation.get('product_id'))
+            quantity = int(operation.get('quantity', 1))
+        except (TypeError, ValueError):
+            return jsonify({'error': f'Operation {index}: product_id and quantity must be integers'}), 400
+        if operation['op'] != 'remove' and not catalog.get(product_id):
+            return jsonify({'error': f'Operation {index}: product {product_id} not found'}), 404
+        if operation['op'] == 'add' and quantity < 1:
+            return jsonify({'error': f'Operation {index}: quantity must be at least 1'}), 400
+        if quantity > MAX_CART_QUANTITY:
+            return jsonify({'error': f'Operation {index}: quantity must be at most {MAX_CART_QUANTITY}'}), 400
+        parsed.append((operation['op'], product_id, quantity))
+    
+    user_id = get_user_id()
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute('BEGIN IMMEDIATE')
+        
+        for op, product_id, quantity in parsed:
+            if op == 'remove' or (op == 'set' and quantity < 1):
+                cursor.execute('DELETE FROM cart WHERE user_id = ? AND product_id = ?',
+                              (user_id, product_id))
+                continue
+            
+            if op == 'add':
+                new_quantity = f'MIN(quantity + excluded.quantity, {MAX_CART_QUANTITY})'
+            else:
+                new_quantity = 'excluded.quantity'
+            cursor.execute(f'''
+                INSERT INTO cart (user_id, product_id, quantity) VALUES (?, ?, ?)
+                ON CONFLICT (user_id, product_id) DO UPDATE SET quantity = {new_quantity}
+            ''', (user_id, product_id, quantity))
         
+        conn.commit()
+        user_summaries.invalidate(user_id)
+        
+        result, total, count = get_cart_summary(cursor, user_id)
         conn.close()
         
         return jsonify({
             'success': True,
-            'message': 'Removed from cart',
+            'message': 'Cart updated',
             'cart_items': result,
             'cart_total': total,
             'cart_count': count
         })
         
     except Exception as e:
+        # close() rolls back whatever the failed batch left open
         conn.close()
         return jsonify({'error': str(e)}), 500
 
@@ -695,6 +1015,7 @@ def clear_cart():
         # Clear cart for this user
         cursor.execute('DELETE FROM cart WHERE user_id = ?', (user_id,))
         conn.commit()
+        user_summaries.invalidate(user_id)
         
         conn.close()
         
@@ -734,6 +1055,7 @@ def get_wishlist():
     for item in wishlist_items:
         item_dict = dict(item)
         item_dict['specs'] = json.loads(item_dict['specs'])
+        item_dict['in_wishlist'] = True
         result.append(item_dict)
     
     conn.close()
@@ -751,30 +1073,28 @@ def add_to_wishlist(product_id):
     
     try:
         # Check if product exists
-        cursor.execute('SELECT id FROM products WHERE id = ?', (product_id,))
-        if not cursor.fetchone():
+        if not catalog.get(product_id):
             conn.close()
             return jsonify({'error': 'Product not found'}), 404
         
-        # Check if already in wishlist
-        cursor.execute('SELECT id FROM wishlist WHERE user_id = ? AND product_id = ?', 
-                      (user_id, product_id))
-        
-        if cursor.fetchone():
-            conn.close()
-            return jsonify({'error': 'Already in wishlist'}), 400
-        
-        # Add to wishlist
+        # Add to wishlist; no returned row means it was already there
         cursor.execute('''
             INSERT INTO wishlist (user_id, product_id) 
             VALUES (?, ?)
+            ON CONFLICT (user_id, product_id) DO NOTHING
+            RETURNING id
         ''', (user_id, product_id))
         
+        if not cursor.fetchone():
+            conn.rollback()
+            conn.close()
+            return jsonify({'error': 'Already in wishlist'}), 400
+        
         conn.commit()
+        user_summaries.invalidate(user_id)
         
         # Get new count
-        cursor.execute('SELECT COUNT(*) as count FROM wishlist WHERE user_id = ?', (user_id,))
-        count = cursor.fetchone()['count']
+        _, count = get_user_counts(cursor, user_id)
         
         conn.close()
         return jsonify({
@@ -798,23 +1118,20 @@ def remove_from_wishlist(product_id):
     cursor = conn.cursor()
     
     try:
-        # Check if item exists in wishlist
-        cursor.execute('SELECT id FROM wishlist WHERE user_id = ? AND product_id = ?', 
+        # Remove from wishlist; no returned row means it was not there
+        cursor.execute('DELETE FROM wishlist WHERE user_id = ? AND product_id = ? RETURNING id', 
                       (user_id, product_id))
         
         if not cursor.fetchone():
+            conn.rollback()
             conn.close()
             return jsonify({'error': 'Item not found in wishlist'}), 404
         
-        # Remove from wishlist
-        cursor.execute('DELETE FROM wishlist WHERE user_id = ? AND product_id = ?', 
-                      (user_id, product_id))
-        
         conn.commit()
+        user_summaries.invalidate(user_id)
         
         # Get new count
-        cursor.execute('SELECT COUNT(*) as count FROM wishlist WHERE user_id = ?', (user_id,))
-        count = cursor.fetchone()['count']
+        _, count = get_user_counts(cursor, user_id)
         
         conn.close()
         return jsonify({
@@ -842,119 +1159,15 @@ def chatbot():
         if not message:
             return jsonify({'error': 'Message cannot be empty'}), 400
         
-        # Simple rule-based responses
-        responses = {
-            'greeting': [
-                "Hello! 👋 I'm your AI shopping assistant. How can I help you today?",
-                "Hi there! Welcome to TechStore. How can I assist you?",
-                "Greetings! I'm here to help you with your shopping needs."
-            ],
-            'help': [
-                "I can help you with: • Product information • Category details • Price & deals • Delivery info • Return policy",
-                "I can assist you with: 1. Finding products 2. Checking prices 3. Delivery information 4. Return policies"
-            ],
-            'smartphones': [
-                "We have a wide range of smartphones from Apple, Samsung, OnePlus, Google, and more. Check our smartphone category for the latest models!",
-                "Looking for smartphones? We have iPhones, Samsung Galaxy, Google Pixel, and other premium brands with various price ranges."
-            ],
-            'laptops': [
-                "We offer laptops for every need: MacBook for professionals, gaming laptops from Asus and MSI, and ultrabooks from Dell and HP.",
-                "Browse our laptop collection featuring MacBooks, Dell XPS, HP Spectre, gaming laptops, and budget-friendly options."
-            ],
-            'headphones': [
-                "We have noise-cancelling headphones from Sony and Bose, premium audio from Sennheiser, and gaming headsets.",
-                "Check out our headphone selection including Sony WH-1000XM5, Bose QC45, Apple AirPods Max, and more!"
-            ],
-            'earbuds': [
-                "Our earbuds collection includes Apple AirPods Pro, Sony WF-1000XM5, Samsung Galaxy Buds, and Bose QuietComfort.",
-                "We have true wireless earbuds from top brands with features like noise cancellation and long battery life."
-            ],
-            'price': [
-                "Prices vary by product and specifications. You can check individual product pages for current prices and deals.",
-                "We offer competitive prices across all categories. Check our deals section for special offers!"
-            ],
-            'delivery': [
-                "We offer free shipping on orders above ₹5000. Delivery usually takes 3-7 business days across India.",
-                "Standard delivery: 5-7 days • Express delivery: 2-3 days (extra charges apply) • Free shipping on orders above ₹5000"
-            ],
-            'return': [
-                "We have a 10-day return policy for unused products in original packaging. Refunds are processed within 5-7 business days.",
-                "Returns are accepted within 10 days of delivery. Products must be unused with original packaging and accessories."
-            ],
-            'contact': [
-                "You can contact us at: • Phone: 1800-123-4567 • Email: support@techstore.com • Address: 123 Tech Street, Mumbai",
-                "Reach us at support@techstore.com or call 1800-123-4567. We're available 9 AM to 8 PM, Monday to Saturday."
-            ],
-            'budget phone': [
-                "For budget smartphones, check out Nothing Phone 2 (₹44,999) or OnePlus 11 5G (₹56,999). Great value for money!",
-                "Best budget options: Nothing Phone 2 (₹44,999) offers great features at an affordable price."
-            ],
-            'camera phone': [
-                "For best camera: iPhone 15 Pro (₹1,29,999), Samsung S23 Ultra (₹1,24,999), or Google Pixel 8 Pro (₹1,06,999).",
-                "Top camera phones: Samsung S23 Ultra with 200MP camera or iPhone 15 Pro with advanced photography features."
-            ],
-            'battery': [
-                "For long battery life: Samsung S23 Ultra (5000mAh), OnePlus 11 (5000mAh), or iPhone 15 Pro (3274mAh).",
-                "Best battery life in smartphones: Samsung Galaxy series and OnePlus models typically have large batteries."
-            ],
-            'storage': [
-                "Most smartphones come with 128GB, 256GB, or 512GB storage options. Some high-end models offer 1TB.",
-                "Storage options vary: Entry-level: 128GB • Mid-range: 256GB • Premium: 512GB-1TB • Choose based on your needs."
-            ],
-            'default': [
-                "I'm not sure I understand. Could you rephrase your question?",
-                "I'm here to help with shopping queries. Try asking about products, prices, or delivery!",
-                "Please ask me about our products, categories, prices, or store policies."
-            ]
-        }
-        
-        # Determine response category based on keywords
-        response_category = 'default'
-        
-        if any(word in message for word in ['hello', 'hi', 'hey', 'greeting']):
-            response_category = 'greeting'
-        elif any(word in message for word in ['help', 'what can you do', 'assist']):
-            response_category = 'help'
-        elif any(word in message for word in ['phone', 'smartphone', 'iphone', 'samsung', 'mobile']):
-            response_category = 'smartphones'
-        elif any(word in message for word in ['laptop', 'macbook', 'notebook', 'computer']):
-            response_category = 'laptops'
-        elif any(word in message for word in ['headphone', 'headset', 'earphone']):
-            response_category = 'headphones'
-        elif any(word in message for word in ['earbud', 'airpod', 'wireless earbud']):
-            response_category = 'earbuds'
-        elif any(word in message for word in ['price', 'cost', 'how much', 'expensive']):
-            response_category = 'price'
-        elif any(word in message for word in ['delivery', 'shipping', 'deliver', 'ship']):
-            response_category = 'delivery'
-        elif any(word in message for word in ['return', 'refund', 'exchange', 'warranty']):
-            response_category = 'return'
-        elif any(word in message for word in ['contact', 'email', 'phone', 'address', 'call']):
-            response_category = 'contact'
-        elif any(word in message for word in ['budget', 'cheap', 'affordable', 'economical']):
-            response_category = 'budget phone'
-        elif any(word in message for word in ['camera', 'photo', 'picture', 'photography']):
-            response_category = 'camera phone'
-        elif any(word in message for word in ['battery', 'charge', 'power', 'backup']):
-            response_category = 'battery'
-        elif any(word in message for word in ['storage', 'memory', 'gb', 'space']):
-            response_category = 'storage'
-        
-        # Get random response from category
-        import random
-        response = random.choice(responses[response_category])
-        
-        # Log the interaction
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        # Match keyword rules in one pass and pick a canned answer
+        category, response = chatbot_rules.reply(message)
+        if category in PRODUCT_TOPICS:
+            # Prefer real products from the current catalog over canned text
+            response = product_retriever.answer(message) or response
         
-        cursor.execute('''
-            INSERT INTO chatbot_logs (user_id, message, response)
-            VALUES (?, ?, ?)
-        ''', (user_id, message, response))
-        
-        conn.commit()
-        conn.close()
+        # Log the interaction (queued; stamped now since the write is deferred)
+        timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        chat_log_writer.submit((user_id, message, response, timestamp))
         
         return jsonify({'response': response})
         
@@ -963,47 +1176,98 @@ def chatbot():
         return jsonify({'error': f'Chatbot error: {str(e)}'}), 500
 
 # Order Management
+# One statement per page: each order row carries its line items as a JSON
+# array built by a correlated json_group_array over idx_order_items_order
+ORDER_SELECT = '''
+    SELECT o.id, o.order_id, o.user_id, o.products, o.total_amount, o.shipping_address,
+           o.payment_method, o.status, o.created_at,
+           (SELECT json_group_array(json_object(
+                       'id', oi.id, 'order_id', oi.order_id, 'product_id', oi.product_id,
+                       'name', p.name, 'image', p.image,
+                       'quantity', oi.quantity, 'price', oi.price))
+            FROM order_items oi
+            JOIN products p ON p.id = oi.product_id
+            WHERE oi.order_id = o.id) AS items
+    FROM orders o
+'''
+ORDER_SORT = 'created_at'
+DEFAULT_ORDER_PAGE_SIZE = 10
+
+def order_from_row(row):
+    order = dict(row)
+    order['items'] = json.loads(order['items'])
+    return order
+
 @app.route('/api/orders', methods=['GET', 'POST'])
 def orders():
-    """Get user orders or create new order - MISSING ENDPOINT"""
+    """Get a page of user orders (newest first, ?limit=&after=) or create new order"""
     if not is_logged_in():
         return jsonify({'error': 'Please login first'}), 401
     
     user_id = get_user_id()
     
     if request.method == 'GET':
-        # Get user orders
+        try:
+            limit = int(request.args.get('limit', DEFAULT_ORDER_PAGE_SIZE))
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer'}), 400
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        
+        after = request.args.get('after')
+        try:
+            cursor_key = decode_cursor(ORDER_SORT, after) if after else None
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if cursor_key is not None and (len(cursor_key) != 2 or not isinstance(cursor_key[0], str)
+                                       or not isinstance(cursor_key[1], int)):
+            return jsonify({'error': 'Invalid cursor'}), 400
+        
+        # Keyset pagination on (created_at, id), served in order by
+        # idx_orders_user_created (the rowid is the index's implicit last key)
         conn = get_db_connection()
         cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT * FROM orders 
-            WHERE user_id = ?
-            ORDER BY created_at DESC
-        ''', (user_id,))
+        if cursor_key:
+            cursor.execute(ORDER_SELECT + '''
+                WHERE o.user_id = ? AND (o.created_at, o.id) < (?, ?)
+                ORDER BY o.created_at DESC, o.id DESC
+                LIMIT ?
+            ''', (user_id, *cursor_key, limit + 1))
+        else:
+            cursor.execute(ORDER_SELECT + '''
+                WHERE o.user_id = ?
+                ORDER BY o.created_at DESC, o.id DESC
+                LIMIT ?
+            ''', (user_id, limit + 1))
         
-        orders = cursor.fetchall()
-        result = []
+        rows = cursor.fetchall()
+        conn.close()
         
-        for order in orders:
-            order_dict = dict(order)
-            result.append(order_dict)
+        result = [order_from_row(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = result[-1]
+            next_cursor = encode_cursor(ORDER_SORT, (last['created_at'], last['id']))
         
-        conn.close()
-        return jsonify(result)
+        return jsonify({'next_cursor': next_cursor, 'orders': result})
     
     elif request.method == 'POST':
         # Create new order from cart
-        data = request.get_json()
+        data = request.get_json(silent=True) or {}
         payment_method = data.get('payment_method', 'cod')
         
         conn = get_db_connection()
         cursor = conn.cursor()
         
         try:
-            # Get cart items
+            # Take the write lock up front: the cart snapshot, stock checks and
+            # decrements below all see the same state, and a competing checkout
+            # waits (busy_timeout) instead of failing halfway through
+            cursor.execute('BEGIN IMMEDIATE')
+            
+            # Snapshot the cart with current prices and stock
             cursor.execute('''
-                SELECT c.quantity, p.*
+                SELECT c.product_id, c.quantity, p.name, p.price, p.stock
                 FROM cart c
                 JOIN products p ON c.product_id = p.id
                 WHERE c.user_id = ?
@@ -1012,53 +1276,88 @@ def orders():
             cart_items = cursor.fetchall()
             
             if not cart_items:
+                conn.rollback()
                 conn.close()
                 return jsonify({'error': 'Cart is empty'}), 400
             
+            unavailable = [
+                {'product_id': item['product_id'], 'name': item['name'],
+                 'requested': item['quantity'], 'available': item['stock']}
+                for item in cart_items if item['quantity'] > item['stock']
+            ]
+            if unavailable:
+                conn.rollback()
+                conn.close()
+                return jsonify({'error': 'Some items are out of stock', 'unavailable': unavailable}), 409
+            
+            # Conditional decrement; the stock guard makes overselling impossible
+            # even if this path ever runs without the IMMEDIATE lock
+            cursor.executemany(
+                'UPDATE products SET stock = stock - ? WHERE id = ? AND stock >= ?',
+                [(item['quantity'], item['product_id'], item['quantity']) for item in cart_items]
+            )
+            if cursor.rowcount != len(cart_items):
+                conn.rollback()
+                conn.close()
+                return jsonify({'error': 'Stock changed during checkout, please try again'}), 409
+            
+            shipping_address = data.get('shipping_address')
+            if not shipping_address:
+                cursor.execute('SELECT address, pincode FROM users WHERE id = ?', (user_id,))
+                user = cursor.fetchone()
+                shipping_address = f"{user['address']}, {user['pincode']}" if user else ''
+            
             # Calculate total
             total_amount = sum(item['price'] * item['quantity'] for item in cart_items)
+            products = [
+                {'product_id': item['product_id'], 'name': item['name'],
+                 'quantity': item['quantity'], 'price': item['price']}
+                for item in cart_items
+            ]
             
             # Create order
+            order_number = f"ORD{datetime.now(timezone.utc):%Y%m%d}{secrets.token_hex(4).upper()}"
             cursor.execute('''
-                INSERT INTO orders (user_id, total_amount, payment_method, status)
-                VALUES (?, ?, ?, 'Pending')
-            ''', (user_id, total_amount, payment_method,))
+                INSERT INTO orders (order_id, user_id, products, total_amount,
+                                    shipping_address, payment_method, status)
+                VALUES (?, ?, ?, ?, ?, ?, 'pending')
+            ''', (order_number, user_id, json.dumps(products), total_amount,
+                  shipping_address, payment_method))
             
             order_id = cursor.lastrowid
             
             # Add order items
-            for item in cart_items:
-                cursor.execute('''
-                    INSERT INTO order_items (order_id, product_id, quantity, price)
-                    VALUES (?, ?, ?, ?)
-                ''', (order_id, item['id'], item['quantity'], item['price']))
+            cursor.executemany('''
+                INSERT INTO order_items (order_id, product_id, quantity, price)
+                VALUES (?, ?, ?, ?)
+            ''', [(order_id, item['product_id'], item['quantity'], item['price']) for item in cart_items])
             
             # Clear cart
             cursor.execute('DELETE FROM cart WHERE user_id = ?', (user_id,))
             
             conn.commit()
-            
-            # Get cart count after clearing
-            cursor.execute('SELECT COUNT(*) as count FROM cart WHERE user_id = ?', (user_id,))
-            cart_count = cursor.fetchone()['count']
+            user_summaries.invalidate(user_id)
             
             conn.close()
             
             return jsonify({
                 'success': True,
                 'message': 'Order placed successfully',
-                'order_id': order_id,
-                'cart_count': cart_count
+                'order_id': order_number,
+                'id': order_id,
+                'total_amount': total_amount,
+                'cart_count': 0
             })
             
         except Exception as e:
+            # close() rolls back the half-finished checkout
             conn.close()
             print(f"Order creation error: {str(e)}")
             return jsonify({'error': str(e)}), 500
 
 @app.route('/api/orders/<int:order_id>', methods=['GET'])
 def get_order(order_id):
-    """Get specific order details - MISSING ENDPOINT"""
+    """Get specific order details with its line items"""
     if not is_logged_in():
         return jsonify({'error': 'Please login first'}), 401
     
@@ -1066,31 +1365,15 @@ def get_order(order_id):
     conn = get_db_connection()
     cursor = conn.cursor()
     
-    # Get order
-    cursor.execute('SELECT * FROM orders WHERE id = ? AND user_id = ?', (order_id, user_id))
+    cursor.execute(ORDER_SELECT + 'WHERE o.id = ? AND o.user_id = ?', (order_id, user_id))
     order = cursor.fetchone()
+    conn.close()
     
     if not order:
-        conn.close()
         return jsonify({'error': 'Order not found'}), 404
     
-    # Get order items
-    cursor.execute('''
-        SELECT oi.*, p.name, p.image
-        FROM order_items oi
-        JOIN products p ON oi.product_id = p.id
-        WHERE oi.order_id = ?
-    ''', (order_id,))
-    
-    items = cursor.fetchall()
-    
-    result = {
-        'order': dict(order),
-        'items': [dict(item) for item in items]
-    }
-    
-    conn.close()
-    return jsonify(result)
+    order = order_from_row(order)
+    return jsonify({'order': order, 'items': order.pop('items')})
 
 # Test route for debugging images
 @app.route('/test_images')
@@ -1148,6 +1431,41 @@ def test_images():
 def not_found(e):
     return jsonify({'error': 'Not found'}), 404
 
+# Static Assets
+@app.template_global()
+def asset_url(path):
+    """Fingerprinted URL of a file under static/"""
+    if app.debug:
+        assets.refresh(path)
+    return assets.url(path)
+
+@app.route('/assets/<path:filename>')
+def hashed_asset(filename):
+    """Serve a fingerprinted asset, precompressed when the client accepts it"""
+    resolved = assets.resolve(filename, request.accept_encodings)
+    if resolved is None:
+        return jsonify({'error': 'Not found'}), 404
+    
+    name, encoding = resolved
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    response = send_from_directory(assets.dist_folder, name, mimetype=mimetype,
+                                   max_age=IMMUTABLE_MAX_AGE)
+    if encoding:
+        response.content_encoding = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.immutable = True
+    return response
+
+@app.after_request
+def cache_image_variants(response):
+    # Image variant names include a content hash, so they never change
+    if request.path.startswith(product_images.url_prefix) and response.status_code == 200:
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = IMMUTABLE_MAX_AGE
+        response.cache_control.immutable = True
+    return response
+
 @app.errorhandler(500)
 def server_error(e):
     return jsonify({'error': 'Internal server error'}), 500
@@ -1161,6 +1479,11 @@ def after_request(response):
     response.headers.add('Access-Control-Allow-Credentials', 'true')
     return response
 
+# Response compression
+@app.after_request
+def compress_response(response):
+    return response_compressor.compress(response, request.accept_encodings)
+
 if __name__ == '__main__':
     # Initialize database
     if init_db():
@@ -1182,6 +1505,7 @@ if __name__ == '__main__':
         print("  POST /api/cart/update/<id>")
         print("  POST /api/cart/remove/<id>")
         print("  POST /api/cart/clear")
+        print("  POST /api/cart/batch")
         print("  GET  /api/wishlist")
         print("  POST /api/wishlist/add/<id>")
         print("  POST /api/wishlist/remove/<id>")
@@ -1189,9 +1513,20 @@ if __name__ == '__main__':
         print("  GET  /api/orders")
         print("  POST /api/orders")
         print("  GET  /api/orders/<id>")
+        print("  GET  /api/bootstrap")
+        print("  GET  /api/stats")
     else:
         print("Warning: Database not found")
         print("Please run database.py first to create the database")
     
+    # Render any missing or outdated image variants before serving
+    if product_images.available:
+        counts = product_images.build()
+        print(f"Product images: {counts['images']} cached, {counts['rendered']} rendered")
+    
+    # Fingerprint static assets (deployments run `python assets.py` instead)
+    counts = assets.build()
+    print(f"Static assets: {counts['assets']} fingerprinted, {counts['written']} files written")
+    
     # Run the app
     app.run(debug=True, port=5000, host='0.0.0.0')
\ No newline at end of file
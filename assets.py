@@ -0,0 +1,182 @@
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+
+try:
+    import brotli
+except ImportError:  # .br copies are skipped; gzip is always available
+    brotli = None
+
+# Directories under static/ whose files get fingerprinted copies
+ASSET_DIRECTORIES = ('css', 'js', 'images/products')
+# Only text formats are worth precompressing; PNG/WebP are compressed already
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.svg', '.json', '.html', '.txt')
+MANIFEST_NAME = 'manifest.json'
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def fingerprint(path, data):
+    """css/style.css -> css/style.<hash>.css"""
+    stem, ext = os.path.splitext(path)
+    return f'{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}'
+
+
+def _write(path, data, overwrite=False):
+    if not overwrite and os.path.exists(path):
+        return False  # content-addressed: an existing file is already right
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    # A private temp file per call, so concurrent builds never share one
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        os.remove(tmp)
+        raise
+    return True
+
+
+class AssetManifest:
+    """Content-hashed copies of the static files, with precompressed twins.
+
+    build() copies every file under ``directories`` to ``dist_folder`` as
+    name.<hash>.ext, writes .gz (and .br when the brotli module is
+    installed) next to compressible ones, and records the mapping in a
+    manifest. Templates link url(path), so a changed file gets a new URL
+    and the old one can be cached forever.
+
+    build() is a deploy step (``python assets.py``); app processes only
+    load() the manifest it wrote.
+    """
+
+    def __init__(self, static_folder, dist_folder, url_prefix='/assets/', directories=ASSET_DIRECTORIES):
+        self.static_folder = static_folder
+        self.dist_folder = dist_folder
+        self.url_prefix = url_prefix.rstrip('/') + '/'
+        self.directories = directories
+        self.files = {}  # source path (relative to static/) -> hashed path
+        self._hashed = set()
+        self._mtimes = {}
+
+    def load(self):
+        """Read the manifest written by the last build (missing = plain /static/ URLs)"""
+        try:
+            with open(os.path.join(self.dist_folder, MANIFEST_NAME)) as f:
+                self.files = json.load(f)
+        except (OSError, ValueError):
+            self.files = {}
+        self._hashed = set(self.files.values())
+        self._mtimes = {}
+        return self
+
+    def _sources(self):
+        for directory in self.directories:
+            root = os.path.join(self.static_folder, directory)
+            if not os.path.isdir(root):
+                continue
+            for dirpath, _, filenames in os.walk(root):
+                for filename in filenames:
+                    full = os.path.join(dirpath, filename)
+                    yield os.path.relpath(full, self.static_folder).replace(os.sep, '/')
+
+    def _add(self, path):
+        """Fingerprint one source file; returns the number of files written"""
+        source = os.path.join(self.static_folder, path)
+        with open(source, 'rb') as f:
+            data = f.read()
+        hashed = fingerprint(path, data)
+        target = os.path.join(self.dist_folder, hashed)
+
+        written = int(_write(target, data))
+        if path.lower().endswith(COMPRESSIBLE_EXTENSIONS):
+            for encoding, suffix in ENCODINGS:
+                if encoding == 'br':
+                    if brotli is None:
+                        continue
+                    compressed = brotli.compress(data, quality=11)
+                else:
+                    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+                if len(compressed) < len(data):
+                    written += _write(target + suffix, compressed)
+
+        self.files[path] = hashed
+        self._hashed.add(hashed)
+        self._mtimes[path] = os.stat(source).st_mtime_ns
+        return written
+
+    def build(self):
+        """Fingerprint every asset, write the manifest and prune stale copies"""
+        self.files = {}
+        self._hashed = set()
+        written = sum(self._add(path) for path in sorted(self._sources()))
+
+        keep = {MANIFEST_NAME}
+        for hashed in self._hashed:
+            keep.update(hashed + suffix for suffix in ('', '.gz', '.br'))
+        removed = 0
+        for dirpath, _, filenames in os.walk(self.dist_folder):
+            for filename in filenames:
+                full = os.path.join(dirpath, filename)
+                # .tmp files may be another worker's build in progress
+                if filename.endswith('.tmp'):
+                    continue
+                if os.path.relpath(full, self.dist_folder).replace(os.sep, '/') not in keep:
+                    try:
+                        os.remove(full)
+                    except FileNotFoundError:
+                        continue  # pruned by a concurrent build
+                    removed += 1
+
+        manifest = json.dumps(self.files, indent=1, sort_keys=True).encode()
+        _write(os.path.join(self.dist_folder, MANIFEST_NAME), manifest, overwrite=True)
+        return {'assets': len(self.files), 'written': written, 'removed': removed}
+
+    def refresh(self, path):
+        """Re-fingerprint one asset if it changed on disk (used in debug mode)"""
+        try:
+            mtime = os.stat(os.path.join(self.static_folder, path)).st_mtime_ns
+        except OSError:
+            return
+        if self._mtimes.get(path) != mtime and path in self.files:
+            self._add(path)
+
+    def url(self, path):
+        """Fingerprinted URL of a static file, or its plain /static/ URL if unknown"""
+        hashed = self.files.get(path)
+        if hashed is None:
+            return '/static/' + path
+        return self.url_prefix + hashed
+
+    def resolve(self, hashed, accept_encodings):
+        """(file name under dist_folder, content encoding) to send, or None if unknown.
+
+        ``accept_encodings`` is the request's parsed Accept-Encoding header.
+        """
+        if hashed not in self._hashed:
+            return None
+        for encoding, suffix in ENCODINGS:
+            if accept_encodings.quality(encoding) > 0 and \
+                    os.path.exists(os.path.join(self.dist_folder, hashed + suffix)):
+                return hashed + suffix, encoding
+        return hashed, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fingerprint and precompress static assets')
+    parser.add_argument('--static', default='static')
+    parser.add_argument('--dist', default=os.path.join('static', 'dist'))
+    args = parser.parse_args()
+
+    counts = AssetManifest(args.static, args.dist).build()
+    print(f"{counts['assets']} assets: {counts['written']} files written, "
+          f"{counts['removed']} stale files removed"
+          f"{'' if brotli else ' (brotli not installed, .br skipped)'}")
+
+
+if __name__ == '__main__':
+    main()
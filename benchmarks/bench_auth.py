@@ -0,0 +1,84 @@
+"""Catalog latency under a login burst, with bounded vs unbounded hashing.
+
+Usage: python benchmarks/bench_auth.py [--seconds 5] [--browsers 4] [--logins 16]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+workdir = tempfile.mkdtemp(prefix='techstore-bench-')
+os.environ['DATABASE'] = os.path.join(workdir, 'database.db')
+shutil.copy(os.path.join(ROOT, 'database.db'), os.environ['DATABASE'])
+
+import app as techstore  # noqa: E402
+from passwords import PasswordHasher  # noqa: E402
+
+CREDENTIALS = {'identifier': 'john@example.com', 'password': 'password123'}
+
+
+def browse(stop, latencies):
+    client = techstore.app.test_client()
+    while not stop.is_set():
+        start = time.perf_counter()
+        client.get('/api/products/1')
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+def login(stop, outcomes):
+    client = techstore.app.test_client()
+    while not stop.is_set():
+        outcomes.append(client.post('/api/auth/login', json=CREDENTIALS).status_code)
+
+
+def run(seconds, browsers, logins):
+    stop = threading.Event()
+    latencies, outcomes = [], []
+    threads = [threading.Thread(target=browse, args=(stop, latencies)) for _ in range(browsers)]
+    threads += [threading.Thread(target=login, args=(stop, outcomes)) for _ in range(logins)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    return (statistics.median(latencies), p99,
+            outcomes.count(200) / seconds, outcomes.count(503) / seconds)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--browsers', type=int, default=4)
+    parser.add_argument('--logins', type=int, default=16)
+    args = parser.parse_args()
+
+    configs = [
+        ('catalog only', None, 0),
+        ('unbounded hashing', PasswordHasher(workers=args.logins, max_pending=10 ** 6), args.logins),
+        ('bounded (default)', techstore.password_hasher, args.logins),
+    ]
+
+    print(f"{'scenario':<20}{'p50 ms':>9}{'p99 ms':>9}{'logins/s':>10}{'rejected/s':>12}")
+    for name, hasher, logins in configs:
+        if hasher is not None:
+            techstore.password_hasher = hasher
+        p50, p99, ok, rejected = run(args.seconds, args.browsers, logins)
+        print(f'{name:<20}{p50:>9.2f}{p99:>9.2f}{ok:>10.1f}{rejected:>12.1f}')
+
+    techstore.db_pool.close_all()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
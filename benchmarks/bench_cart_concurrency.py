@@ -0,0 +1,87 @@
+"""Fire concurrent cart/wishlist adds and verify no duplicate rows appear.
+
+Usage: python benchmarks/bench_cart_concurrency.py [--threads 16] [--adds 200]
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+workdir = tempfile.mkdtemp(prefix='techstore-bench-')
+os.environ['DATABASE'] = os.path.join(workdir, 'database.db')
+shutil.copy(os.path.join(ROOT, 'database.db'), os.environ['DATABASE'])
+
+import app as techstore  # noqa: E402
+
+USER_ID = 1
+PRODUCT_IDS = [1, 2, 3]
+
+
+def worker(adds):
+    client = techstore.app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = USER_ID
+
+    ok = 0
+    for i in range(adds):
+        product_id = PRODUCT_IDS[i % len(PRODUCT_IDS)]
+        if client.post(f'/api/cart/add/{product_id}').status_code == 200:
+            ok += 1
+        # Every thread races to add the same wishlist items too
+        client.post(f'/api/wishlist/add/{product_id}')
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--adds', type=int, default=200, help='cart adds per thread')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.threads) as pool:
+        succeeded = sum(pool.map(worker, [args.adds] * args.threads))
+    elapsed = time.perf_counter() - start
+
+    conn = sqlite3.connect(techstore.DATABASE)
+    duplicates = conn.execute('''
+        SELECT 'cart', product_id, COUNT(*) FROM cart WHERE user_id = ? GROUP BY product_id HAVING COUNT(*) > 1
+        UNION ALL
+        SELECT 'wishlist', product_id, COUNT(*) FROM wishlist WHERE user_id = ? GROUP BY product_id HAVING COUNT(*) > 1
+    ''', (USER_ID, USER_ID)).fetchall()
+    total_quantity = conn.execute('SELECT COALESCE(SUM(quantity), 0) FROM cart WHERE user_id = ?',
+                                  (USER_ID,)).fetchone()[0]
+    stats = conn.execute('SELECT cart_count, wishlist_count FROM user_stats WHERE user_id = ?',
+                         (USER_ID,)).fetchone()
+    conn.close()
+
+    requests = args.threads * args.adds * 2
+    print(f'{requests} requests from {args.threads} threads in {elapsed:.2f}s '
+          f'({requests / elapsed:.0f} req/s)')
+    print(f'successful cart adds: {succeeded}, summed cart quantity: {total_quantity}')
+    print(f'user_stats: cart_count={stats[0]}, wishlist_count={stats[1]}')
+
+    techstore.db_pool.close_all()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    problems = []
+    if duplicates:
+        problems.append(f'duplicate rows: {duplicates}')
+    if total_quantity != succeeded:
+        problems.append('lost or phantom quantity updates')
+    if tuple(stats) != (len(PRODUCT_IDS), len(PRODUCT_IDS)):
+        problems.append('user_stats out of sync')
+    if problems:
+        sys.exit('FAILED: ' + '; '.join(problems))
+    print('OK: no duplicate rows, no lost updates')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""Chatbot keyword matching: original any() chain vs the compiled matcher.
+
+Runs on the shipped rule table and on one padded with synthetic low-priority
+rules, to show how each approach scales with the number of keywords.
+
+Usage: python benchmarks/bench_chatbot.py [--messages 20000] [--extra-rules 200]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from chatbot import RESPONSES, RULES, Chatbot  # noqa: E402
+
+FILLER = ['i', 'want', 'a', 'the', 'new', 'good', 'please', 'for', 'my', 'with', 'tell', 'me',
+          'about', 'this', 'that', 'is', 'there', 'any', 'best', 'under', '50000', 'rupees']
+
+
+def legacy_classify(rules, message):
+    """The if/elif chain the chatbot route used to run on every message"""
+    for category, keywords in rules:
+        if any(word in message for word in keywords):
+            return category
+    return 'default'
+
+
+def synthetic_rules(count, rng):
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    return [(f'extra{i}', [''.join(rng.choices(letters, k=rng.randint(6, 10))) for _ in range(4)])
+            for i in range(count)]
+
+
+def corpus(count, rng):
+    keywords = [keyword for _, words in RULES for keyword in words]
+    for _ in range(count):
+        words = rng.choices(FILLER, k=rng.randint(3, 15))
+        for _ in range(rng.randint(0, 2)):
+            words.insert(rng.randrange(len(words) + 1), rng.choice(keywords))
+        yield ' '.join(words)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=20000)
+    parser.add_argument('--extra-rules', type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    messages = list(corpus(args.messages, rng))
+    messages += ['headphones', 'wireless earbuds', 'this', 'shipping to my address', 'hi']
+    extra = synthetic_rules(args.extra_rules, rng)
+
+    print(f"{'rule table':<22}{'any() chain':>14}{'compiled':>14}")
+    for label, rules in ((f'{len(RULES)} rules', RULES), (f'{len(RULES) + len(extra)} rules', RULES + extra)):
+        responses = dict(RESPONSES, **{category: ['...'] for category, _ in extra})
+        bot = Chatbot(rules, responses)
+
+        mismatches = [m for m in messages if legacy_classify(rules, m) != bot.classify(m)]
+        if mismatches:
+            sys.exit(f'FAILED: {len(mismatches)} messages classified differently, e.g. {mismatches[:3]}')
+
+        timings = []
+        for classify in (lambda m: legacy_classify(rules, m), bot.classify):
+            start = time.perf_counter()
+            for message in messages:
+                classify(message)
+            timings.append((time.perf_counter() - start) / len(messages) * 1e6)
+        print(f'{label:<22}{timings[0]:>11.2f} us{timings[1]:>11.2f} us')
+
+    print(f'OK: identical categories for all {len(messages)} messages')
+
+
+if __name__ == '__main__':
+    main()
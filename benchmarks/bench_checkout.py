@@ -0,0 +1,108 @@
+"""Race many concurrent checkouts for one scarce product and verify no overselling.
+
+Every buyer has the hot product (and one plentiful product) in their cart;
+only ``--stock`` of them can succeed, the rest must get 409 with their cart
+left intact.
+
+Usage: python benchmarks/bench_checkout.py [--threads 16] [--buyers 400] [--stock 100]
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+workdir = tempfile.mkdtemp(prefix='techstore-bench-')
+os.environ['DATABASE'] = os.path.join(workdir, 'database.db')
+shutil.copy(os.path.join(ROOT, 'database.db'), os.environ['DATABASE'])
+
+import app as techstore  # noqa: E402
+
+HOT_PRODUCT = 1
+PLENTIFUL_PRODUCT = 2
+
+
+def seed(buyers, stock):
+    """Create buyer accounts with filled carts; returns their user ids"""
+    conn = sqlite3.connect(techstore.DATABASE)
+    with conn:
+        conn.execute('UPDATE products SET stock = ? WHERE id = ?', (stock, HOT_PRODUCT))
+        conn.execute('UPDATE products SET stock = ? WHERE id = ?', (buyers * 10, PLENTIFUL_PRODUCT))
+        user_ids = []
+        for i in range(buyers):
+            cursor = conn.execute('''
+                INSERT INTO users (full_name, email, phone, address, pincode, password)
+                VALUES (?, ?, ?, '1 Bench Street, Pune', '411001', 'x')
+            ''', (f'Buyer {i}', f'buyer{i}@example.com', f'9{i:09d}'))
+            user_ids.append(cursor.lastrowid)
+        conn.executemany('INSERT INTO cart (user_id, product_id, quantity) VALUES (?, ?, ?)',
+                         [(user_id, product_id, 1) for user_id in user_ids
+                          for product_id in (HOT_PRODUCT, PLENTIFUL_PRODUCT)])
+    conn.close()
+    return user_ids
+
+
+def checkout(user_id):
+    client = techstore.app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = user_id
+    return client.post('/api/orders', json={'payment_method': 'cod'}).status_code
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--buyers', type=int, default=400)
+    parser.add_argument('--stock', type=int, default=100)
+    args = parser.parse_args()
+
+    user_ids = seed(args.buyers, args.stock)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.threads) as pool:
+        statuses = list(pool.map(checkout, user_ids))
+    elapsed = time.perf_counter() - start
+
+    conn = sqlite3.connect(techstore.DATABASE)
+    stock = conn.execute('SELECT stock FROM products WHERE id = ?', (HOT_PRODUCT,)).fetchone()[0]
+    orders = conn.execute('SELECT COUNT(*) FROM orders').fetchone()[0]
+    sold = conn.execute('SELECT COALESCE(SUM(quantity), 0) FROM order_items WHERE product_id = ?',
+                        (HOT_PRODUCT,)).fetchone()[0]
+    carts_left = conn.execute('SELECT COUNT(DISTINCT user_id) FROM cart').fetchone()[0]
+    conn.close()
+
+    placed = statuses.count(200)
+    rejected = statuses.count(409)
+    print(f'{len(statuses)} checkouts from {args.threads} threads in {elapsed:.2f}s '
+          f'({len(statuses) / elapsed:.0f} checkouts/s, {placed / elapsed:.0f} orders/s)')
+    print(f'placed: {placed}, out of stock: {rejected}, other: {len(statuses) - placed - rejected}')
+    print(f'orders rows: {orders}, hot units sold: {sold}, stock left: {stock}, carts left: {carts_left}')
+
+    techstore.db_pool.close_all()
+    techstore.chat_log_writer.close()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    problems = []
+    if placed + rejected != len(statuses):
+        problems.append('unexpected errors')
+    if stock < 0 or sold > args.stock:
+        problems.append('oversold')
+    if placed != min(args.stock, args.buyers) or orders != placed or sold != placed:
+        problems.append('orders do not match successful checkouts')
+    if stock != args.stock - sold:
+        problems.append('stock does not match units sold')
+    if carts_left != args.buyers - placed:
+        problems.append('cart not cleared (or cleared on failure)')
+    if problems:
+        sys.exit('FAILED: ' + '; '.join(problems))
+    print('OK: no overselling, every order and stock change accounted for')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""Requests per second with fresh-per-request connections vs the pool.
+
+Usage: python benchmarks/bench_db_pool.py [--requests 2000]
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Work on a copy so the benchmark never touches the real database
+workdir = tempfile.mkdtemp(prefix='techstore-bench-')
+os.environ['DATABASE'] = os.path.join(workdir, 'database.db')
+shutil.copy(os.path.join(ROOT, 'database.db'), os.environ['DATABASE'])
+
+import app as techstore  # noqa: E402
+
+
+def legacy_connection():
+    conn = sqlite3.connect(techstore.DATABASE)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def seed_cart(user_id):
+    conn = sqlite3.connect(techstore.DATABASE)
+    conn.execute('DELETE FROM cart WHERE user_id = ?', (user_id,))
+    conn.executemany('INSERT INTO cart (user_id, product_id, quantity) VALUES (?, ?, 1)',
+                     [(user_id, product_id) for product_id in range(1, 9)])
+    conn.commit()
+    conn.close()
+
+
+def run(client, path, requests):
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = client.get(path)
+        assert response.status_code == 200, response.status_code
+    return requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    seed_cart(1)
+    client = techstore.app.test_client()
+    with client.session_transaction() as sess:
+        sess['user_id'] = 1
+
+    pooled_connection = techstore.get_db_connection
+    paths = ['/api/products/1', '/api/cart']
+
+    print(f"{'endpoint':<20}{'before (req/s)':>16}{'after (req/s)':>16}{'speedup':>10}")
+    for path in paths:
+        techstore.get_db_connection = legacy_connection
+        before = run(client, path, args.requests)
+        techstore.get_db_connection = pooled_connection
+        run(client, path, 100)  # warm the pool
+        after = run(client, path, args.requests)
+        print(f'{path:<20}{before:>16.0f}{after:>16.0f}{after / before:>9.2f}x')
+
+    techstore.db_pool.close_all()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
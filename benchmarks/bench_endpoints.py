@@ -0,0 +1,395 @@
+"""Per-endpoint latency, throughput and SQL statement counts on a scaled dataset.
+
+Seeds a synthetic database with ``create_database.py --scale`` (products,
+users, cart/wishlist rows, orders, chat logs), then drives every route in
+app.py through the Flask test client from a thread pool: a few warm-up
+requests, one request with SQL tracing to count the statements it executes,
+then ``--requests`` timed requests. Results
+(p50/p95/p99, mean, throughput, statements per request, status codes) are
+printed and written as JSON; ``--baseline`` compares them with an earlier
+run's JSON and fails on regressions.
+
+Usage: python benchmarks/bench_endpoints.py [--products 100000] [--users 50000]
+           [--rows 1000000] [--orders 50000] [--threads 8] [--requests 200]
+           [--only REGEX] [--output results.json] [--baseline baseline.json]
+
+Save a baseline with ``--output baseline.json`` and compare later runs
+(same sizes) with ``--baseline baseline.json``.
+"""
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import re
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from create_database import SAMPLE_PASSWORD, create_database  # noqa: E402
+
+BENCH_EMAIL_DOMAIN = 'bench.example'
+SEARCH_QUERIES = ['samsung', 'noise canc', 'macbook pro', 'wireless earbuds', 'gaming laptop']
+CHAT_MESSAGES = ['hi', 'what is your return policy', 'best phone under 50000',
+                 'do you ship to pune', 'laptop with 16gb ram', 'track my order']
+
+# user(i) -> user id to log in as (None = guest); limit caps the timed requests
+Endpoint = namedtuple('Endpoint', 'name method rule user call limit', defaults=(None,))
+
+
+def seed(database, args):
+    """Generate the dataset with create_database's scale mode; returns row counts"""
+    per_user = args.rows // max(1, 2 * args.users)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        create_database(database, scale={
+            'products': args.products, 'users': args.users, 'cart_items': per_user,
+            'wishlist_items': per_user, 'orders': args.orders, 'seed': args.seed,
+        })
+    seconds = time.perf_counter() - start
+
+    conn = sqlite3.connect(database)
+    counts = {table: conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+              for table in ('products', 'users', 'cart', 'wishlist', 'orders')}
+    conn.close()
+    return {
+        'products': counts['products'],
+        'users': counts['users'],
+        'cart_rows': counts['cart'],
+        'wishlist_rows': counts['wishlist'],
+        'orders': counts['orders'],
+        'seconds': round(seconds, 1),
+    }
+
+
+class StatementCounter:
+    """sqlite3 trace callback counting the statements each connection executes.
+
+    Python reports every trigger step under the (parameter-expanded) text of
+    the statement that fired it, so a run of identical statements on one
+    connection is counted once. That keeps trigger bodies out of the count,
+    but also merges a statement repeated back to back with the same
+    parameters.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+        self._last = {}  # id(connection) -> last statement traced on it
+
+    def trace(self, key, statement):
+        with self._lock:
+            if self._last.get(key) != statement:
+                self._last[key] = statement
+                self.count += 1
+
+    def attach(self, conn):
+        key = id(conn)
+        conn.set_trace_callback(lambda statement: self.trace(key, statement))
+        return conn
+
+    def start(self):
+        """Forget earlier statements so a request's first one always counts"""
+        with self._lock:
+            self._last.clear()
+
+
+class Context:
+    """Ids the endpoint scenarios draw from, read back from the seeded database"""
+
+    def __init__(self, database, count):
+        conn = sqlite3.connect(database)
+        self.users = conn.execute(
+            'SELECT id, full_name, email, phone, address, pincode FROM users ORDER BY id').fetchall()
+        self.products = [row[0] for row in conn.execute('SELECT id FROM products ORDER BY id')]
+        self.categories = [row[0] for row in conn.execute('SELECT DISTINCT category FROM products ORDER BY 1')]
+        self.orders = conn.execute('SELECT id, user_id FROM orders ORDER BY id').fetchall()
+        # For each scenario index, two products in neither the cart nor the
+        # wishlist of that index's user, so add/update/remove start clean
+        self.free = []
+        for i in range(count):
+            user_id = self.user(i)[0]
+            taken = {row[0] for row in conn.execute(
+                'SELECT product_id FROM cart WHERE user_id = ? UNION SELECT product_id FROM wishlist WHERE user_id = ?',
+                (user_id, user_id))}
+            candidates = (self.products[(i * 7919 + k) % len(self.products)] for k in itertools.count())
+            self.free.append(list(itertools.islice((p for p in candidates if p not in taken), 2)))
+        conn.close()
+        # Destructive scenarios (checkout, clear cart) each consume their own users
+        self._fresh = itertools.count(1)
+        self._register = itertools.count()
+
+    def user(self, i):
+        return self.users[i % len(self.users)]
+
+    def fresh_user(self):
+        return self.users[-next(self._fresh) % len(self.users)][0]
+
+    def free_product(self, i, which=0):
+        return self.free[i][which]
+
+    def registration(self):
+        n = next(self._register)
+        return {'full_name': f'New User {n}', 'email': f'new{n}@{BENCH_EMAIL_DOMAIN}',
+                'phone': f'7{n:09d}', 'address': '1 New Street, Pune', 'pincode': '411001',
+                'password': SAMPLE_PASSWORD}
+
+
+def endpoints(ctx, asset_path):
+    """Scenarios covering every route; add/update/remove share (user, product) per index"""
+    def user(i):
+        return ctx.user(i)[0]
+
+    def profile(i):
+        _, name, email, phone, address, pincode = ctx.user(i)
+        return {'full_name': name, 'email': email, 'phone': phone, 'address': address, 'pincode': pincode}
+
+    def product(i):
+        return ctx.products[(i * 7919) % len(ctx.products)]
+
+    def category(i):
+        return ctx.categories[i % len(ctx.categories)]
+
+    def order(i):
+        return ctx.orders[i % len(ctx.orders)] if ctx.orders else (0, None)
+
+    return [
+        Endpoint('index', 'GET', '/', None, lambda c, i: c.get('/')),
+        Endpoint('product page', 'GET', '/product/<int:product_id>', None,
+                 lambda c, i: c.get(f'/product/{product(i)}')),
+        Endpoint('product page (user)', 'GET', '/product/<int:product_id>', user,
+                 lambda c, i: c.get(f'/product/{product(i)}')),
+        Endpoint('products (default page)', 'GET', '/api/products', None, lambda c, i: c.get('/api/products')),
+        Endpoint('products (page)', 'GET', '/api/products', None,
+                 lambda c, i: c.get('/api/products?limit=24&sort=price')),
+        Endpoint('products (page, wishlist)', 'GET', '/api/products', user,
+                 lambda c, i: c.get('/api/products?limit=24&wishlist=1')),
+        Endpoint('deals', 'GET', '/api/deals', None, lambda c, i: c.get('/api/deals')),
+        Endpoint('category (default page)', 'GET', '/api/products/category/<category>', None,
+                 lambda c, i: c.get(f'/api/products/category/{category(i)}')),
+        Endpoint('category (page)', 'GET', '/api/products/category/<category>', None,
+                 lambda c, i: c.get(f'/api/products/category/{category(i)}?limit=24&sort=-rating')),
+        Endpoint('product', 'GET', '/api/products/<int:product_id>', None,
+                 lambda c, i: c.get(f'/api/products/{product(i)}')),
+        Endpoint('bootstrap (guest)', 'GET', '/api/bootstrap', None, lambda c, i: c.get('/api/bootstrap')),
+        Endpoint('bootstrap (user)', 'GET', '/api/bootstrap', user, lambda c, i: c.get('/api/bootstrap')),
+        Endpoint('search', 'GET', '/api/products/search', None,
+                 lambda c, i: c.get('/api/products/search', query_string={'q': SEARCH_QUERIES[i % len(SEARCH_QUERIES)]})),
+        Endpoint('stats', 'GET', '/api/stats', None, lambda c, i: c.get('/api/stats')),
+        Endpoint('register', 'POST', '/api/auth/register', None,
+                 lambda c, i: c.post('/api/auth/register', json=ctx.registration())),
+        Endpoint('login', 'POST', '/api/auth/login', None,
+                 lambda c, i: c.post('/api/auth/login', json={'identifier': ctx.user(i)[2],
+                                                              'password': SAMPLE_PASSWORD})),
+        Endpoint('logout', 'GET', '/api/auth/logout', user, lambda c, i: c.get('/api/auth/logout')),
+        Endpoint('auth check', 'GET', '/api/auth/check', user, lambda c, i: c.get('/api/auth/check')),
+        Endpoint('update profile', 'POST', '/api/auth/update-profile', user,
+                 lambda c, i: c.post('/api/auth/update-profile', json=profile(i))),
+        Endpoint('cart', 'GET', '/api/cart', user, lambda c, i: c.get('/api/cart')),
+        Endpoint('cart add', 'POST', '/api/cart/add/<int:product_id>', user,
+                 lambda c, i: c.post(f'/api/cart/add/{ctx.free_product(i)}', json={'quantity': 1})),
+        Endpoint('cart update', 'POST', '/api/cart/update/<int:product_id>', user,
+                 lambda c, i: c.post(f'/api/cart/update/{ctx.free_product(i)}', json={'quantity': 2})),
+        Endpoint('cart remove', 'POST', '/api/cart/remove/<int:product_id>', user,
+                 lambda c, i: c.post(f'/api/cart/remove/{ctx.free_product(i)}')),
+        Endpoint('cart batch', 'POST', '/api/cart/batch', user,
+                 lambda c, i: c.post('/api/cart/batch', json={'operations': [
+                     {'op': 'add', 'product_id': ctx.free_product(i, 1)},
+                     {'op': 'set', 'product_id': ctx.free_product(i, 1), 'quantity': 3},
+                     {'op': 'remove', 'product_id': ctx.free_product(i, 1)},
+                 ]})),
+        Endpoint('wishlist', 'GET', '/api/wishlist', user, lambda c, i: c.get('/api/wishlist')),
+        Endpoint('wishlist add', 'POST', '/api/wishlist/add/<int:product_id>', user,
+                 lambda c, i: c.post(f'/api/wishlist/add/{ctx.free_product(i)}')),
+        Endpoint('wishlist remove', 'POST', '/api/wishlist/remove/<int:product_id>', user,
+                 lambda c, i: c.post(f'/api/wishlist/remove/{ctx.free_product(i)}')),
+        Endpoint('chatbot', 'POST', '/api/chatbot', None,
+                 lambda c, i: c.post('/api/chatbot', json={'message': CHAT_MESSAGES[i % len(CHAT_MESSAGES)]})),
+        Endpoint('orders', 'GET', '/api/orders', lambda i: order(i)[1], lambda c, i: c.get('/api/orders')),
+        Endpoint('order', 'GET', '/api/orders/<int:order_id>', lambda i: order(i)[1],
+                 lambda c, i: c.get(f'/api/orders/{order(i)[0]}')),
+        Endpoint('checkout', 'POST', '/api/orders', lambda i: ctx.fresh_user(),
+                 lambda c, i: c.post('/api/orders', json={'payment_method': 'cod'})),
+        Endpoint('cart clear', 'POST', '/api/cart/clear', lambda i: ctx.fresh_user(),
+                 lambda c, i: c.post('/api/cart/clear')),
+        Endpoint('asset', 'GET', '/assets/<path:filename>', None,
+                 lambda c, i: c.get(asset_path, headers={'Accept-Encoding': 'gzip'})),
+        Endpoint('static', 'GET', '/static/<path:filename>', None, lambda c, i: c.get('/static/css/style.css')),
+        # Debug page that stats every product image; capped so it cannot dominate the run
+        Endpoint('test images', 'GET', '/test_images', None, lambda c, i: c.get('/test_images'), limit=10),
+    ]
+
+
+def call(app, endpoint, i):
+    """(milliseconds, status code) for one request; session setup is not timed"""
+    client = app.test_client()
+    user_id = endpoint.user(i) if endpoint.user else None
+    if user_id is not None:
+        with client.session_transaction() as sess:
+            sess['user_id'] = user_id
+
+    start = time.perf_counter()
+    response = endpoint.call(client, i)
+    response.get_data()
+    elapsed = (time.perf_counter() - start) * 1000
+    response.close()
+    return elapsed, response.status_code
+
+
+def measure(app, endpoint, counter, args):
+    for i in range(args.warmup):
+        call(app, endpoint, i)
+
+    # Counted alone so concurrent requests cannot leak into the number
+    counter.start()
+    before = counter.count
+    call(app, endpoint, args.warmup)
+    statements = counter.count - before
+
+    first = args.warmup + 1
+    count = min(args.requests, endpoint.limit or args.requests)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(args.threads) as pool:
+        results = list(pool.map(lambda i: call(app, endpoint, i), range(first, first + count)))
+    wall = time.perf_counter() - start
+
+    samples = [ms for ms, _ in results]
+    cuts = statistics.quantiles(samples, n=100, method='inclusive') if len(samples) > 1 else samples * 99
+    return {
+        'method': endpoint.method,
+        'rule': endpoint.rule,
+        'requests': count,
+        'p50_ms': round(cuts[49], 3),
+        'p95_ms': round(cuts[94], 3),
+        'p99_ms': round(cuts[98], 3),
+        'mean_ms': round(statistics.fmean(samples), 3),
+        'throughput_rps': round(count / wall, 1),
+        'sql_statements': statements,
+        'statuses': dict(sorted(Counter(str(status) for _, status in results).items())),
+    }
+
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    """Regression messages for endpoints slower (p95) or chattier than the baseline"""
+    if baseline.get('dataset', {}).get('products') != results['dataset']['products']:
+        print('note: baseline was recorded on a different dataset size')
+
+    regressions = []
+    print(f"\n{'endpoint':<28}{'p95 base':>10}{'p95 now':>10}{'change':>9}{'sql base':>10}{'sql now':>9}")
+    for name, current in results['endpoints'].items():
+        old = baseline.get('endpoints', {}).get(name)
+        if old is None:
+            print(f'{name:<28}{"(new)":>10}')
+            continue
+        change = current['p95_ms'] / old['p95_ms'] - 1 if old['p95_ms'] else 0.0
+        print(f"{name:<28}{old['p95_ms']:>10.2f}{current['p95_ms']:>10.2f}{change:>+9.0%}"
+              f"{old['sql_statements']:>10}{current['sql_statements']:>9}")
+        if change > tolerance and current['p95_ms'] - old['p95_ms'] > min_delta_ms:
+            regressions.append(f"{name} p95 {old['p95_ms']:.2f} -> {current['p95_ms']:.2f} ms")
+        if current['sql_statements'] > old['sql_statements']:
+            regressions.append(f"{name} SQL statements {old['sql_statements']} -> {current['sql_statements']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--products', type=int, default=100000)
+    parser.add_argument('--users', type=int, default=50000)
+    parser.add_argument('--rows', type=int, default=1000000, help='cart + wishlist rows (split evenly)')
+    parser.add_argument('--orders', type=int, default=50000)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200, help='timed requests per endpoint')
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--only', help='regex; run only endpoints whose name matches')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='write the results JSON here')
+    parser.add_argument('--baseline', help='results JSON of an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='allowed relative p95 increase before flagging a regression')
+    parser.add_argument('--min-delta-ms', type=float, default=1.0,
+                        help='ignore p95 increases smaller than this (timer noise on fast endpoints)')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='techstore-bench-')
+    database = os.path.join(workdir, 'database.db')
+    dataset = seed(database, args)
+    print(f"Seeded {dataset['products']} products, {dataset['users']} users, "
+          f"{dataset['cart_rows']} cart + {dataset['wishlist_rows']} wishlist rows, "
+          f"{dataset['orders']} orders in {dataset['seconds']}s")
+
+    os.environ['DATABASE'] = database
+    import app as techstore
+
+    # Trace every connection the request path uses: pooled ones (opened
+    # lazily, so hook the factory) and the catalog cache's own
+    counter = StatementCounter()
+    connect = techstore.db_pool._connect
+    techstore.db_pool._connect = lambda: counter.attach(connect())
+    counter.attach(techstore.catalog._connection())
+
+    ctx = Context(database, args.warmup + 1 + args.requests)
+    # Fingerprinting is a deploy step; run it so the asset route is measured
+    techstore.assets.build()
+    asset_path = techstore.assets.url('css/style.css')
+    scenarios = endpoints(ctx, asset_path)
+    if args.only:
+        scenarios = [endpoint for endpoint in scenarios if re.search(args.only, endpoint.name)]
+
+    uncovered = sorted({rule.rule for rule in techstore.app.url_map.iter_rules()}
+                       - {endpoint.rule for endpoint in endpoints(ctx, asset_path)})
+
+    results = {
+        'dataset': dataset,
+        'config': {'threads': args.threads, 'requests': args.requests, 'warmup': args.warmup},
+        'environment': {'python': platform.python_version(), 'sqlite': sqlite3.sqlite_version},
+        'endpoints': {},
+    }
+    print(f"\n{'endpoint':<28}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}{'sql':>6}  statuses")
+    for endpoint in scenarios:
+        result = measure(techstore.app, endpoint, counter, args)
+        results['endpoints'][endpoint.name] = result
+        statuses = ' '.join(f'{code}x{n}' for code, n in result['statuses'].items())
+        print(f"{endpoint.name:<28}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}"
+              f"{result['p99_ms']:>9.2f}{result['throughput_rps']:>9.0f}"
+              f"{result['sql_statements']:>6}  {statuses}", flush=True)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f'\nResults written to {args.output}')
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance, args.min_delta_ms)
+
+    techstore.db_pool.close_all()
+    techstore.chat_log_writer.close()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    problems = []
+    if uncovered:
+        problems.append('routes without a scenario: ' + ', '.join(uncovered))
+    server_errors = [name for name, result in results['endpoints'].items()
+                     if any(code.startswith('5') for code in result['statuses'])]
+    if server_errors:
+        problems.append('server errors from ' + ', '.join(server_errors))
+    problems.extend(regressions)
+    if problems:
+        sys.exit('FAILED: ' + '; '.join(problems))
+    print('OK: every route exercised without server errors' + (', no regressions' if args.baseline else ''))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Chatbot product retrieval: per-message latency and index rebuild cost.
+
+Scores sample questions against the in-memory BM25 index, then changes one
+product and times the incremental rebuild against a cold one.
+
+Usage: python benchmarks/bench_retrieval.py [--rounds 2000]
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+QUESTIONS = [
+    'phone with 5000 mAh under 60000',
+    'best camera phone',
+    'cheap phone',
+    'laptop under 1.5 lakh',
+    'noise cancelling headphones',
+    'earbuds under 20k',
+    'how much is iphone 15 pro',
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=2000)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp()
+    database = os.path.join(tmpdir, 'database.db')
+    shutil.copy(os.path.join(ROOT, 'database.db'), database)
+
+    from catalog import CatalogCache
+    from retrieval import ProductRetriever
+
+    try:
+        retriever = ProductRetriever(CatalogCache(database))
+        start = time.perf_counter()
+        retriever.index()
+        cold = time.perf_counter() - start
+
+        print(f"{'question':<36}{'latency':>12}  top match")
+        for question in QUESTIONS:
+            start = time.perf_counter()
+            for _ in range(args.rounds):
+                products = retriever.search(question)
+            elapsed = (time.perf_counter() - start) / args.rounds * 1e6
+            top = products[0]['name'] if products else '-'
+            print(f'{question:<36}{elapsed:>9.1f} us  {top}')
+
+        conn = sqlite3.connect(database)
+        with conn:
+            conn.execute('UPDATE products SET price = price - 1 WHERE id = 1')
+        conn.close()
+        start = time.perf_counter()
+        retriever.index()
+        incremental = time.perf_counter() - start
+
+        print(f'\ncold build {cold * 1e3:.2f} ms, rebuild after one change {incremental * 1e3:.2f} ms '
+              f'(includes reloading the catalog snapshot)')
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""LIKE scan vs FTS5 search latency and recall on a generated catalog.
+
+Seeds products with create_database.py's --scale generator, times the old
+LIKE '%query%' scan against search_catalog() from app.py, and checks that
+the trigram index finds every product the LIKE scan matches; exits non-zero
+if any is missing.
+
+Usage: python benchmarks/bench_search.py [--products 100000]
+"""
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from create_database import create_database  # noqa: E402
+
+# A mix of broad terms (thousands of matches to rank), selective ones and
+# substrings inside words; LIKE can stop early on broad terms because it does
+# not rank, but has to scan the whole table when few or no rows match
+QUERIES = ['samsung', 'noise canc', 'pixel 7 pro', 'thinkpad x 12', 'wh-1000xm 3', 'headphne',
+           'phone', 'book', 'pods', 'buds']
+
+# The search endpoint before the FTS5 index
+LIKE_SQL = '''
+    SELECT id FROM products
+    WHERE name LIKE ? OR category LIKE ? OR description LIKE ?
+'''
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--products', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='techstore-bench-')
+    database = os.path.join(workdir, 'database.db')
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        create_database(database, scale={'products': args.products, 'users': 0})
+    print(f'Seeded {args.products} products in {time.perf_counter() - start:.1f}s\n')
+
+    conn = sqlite3.connect(database)
+
+    # Imported only now, against the seeded database, so this measures the
+    # endpoint's own query builder, SQL and ranking
+    os.environ['DATABASE'] = database
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app
+    app.catalog.snapshot()
+
+    cursor = conn.cursor()
+    missed = 0
+    print(f"{'query':<16}{'LIKE (ms)':>12}{'FTS5 (ms)':>12}{'speedup':>10}"
+          f"{'LIKE hits':>11}{'FTS5 hits':>11}{'missed':>8}")
+    for query in QUERIES:
+        term = f'%{query}%'
+        like_sql = LIKE_SQL + ' LIMIT 20'
+        like_ms = timed(lambda: cursor.execute(like_sql, (term, term, term)).fetchall(), args.repeat)
+        fts_ms = timed(lambda: app.search_catalog(cursor, query), args.repeat)
+
+        # Recall: every LIKE match must be in the index's full match set
+        like_ids = {row[0] for row in cursor.execute(LIKE_SQL, (term, term, term))}
+        match = app.fts_query(query)
+        fts_ids = {row[0] for row in cursor.execute(
+            'SELECT rowid FROM products_fts WHERE products_fts MATCH ?', (match,))} if match else like_ids
+        lost = len(like_ids - fts_ids)
+        missed += lost
+        print(f'{query:<16}{like_ms:>12.2f}{fts_ms:>12.2f}{like_ms / fts_ms:>9.2f}x'
+              f'{len(like_ids):>11}{len(fts_ids):>11}{lost:>8}')
+
+    app.chat_log_writer.close()
+    conn.close()
+    shutil.rmtree(workdir, ignore_errors=True)
+    if missed:
+        sys.exit(f'FAIL: the FTS5 index missed {missed} products the LIKE scan matched')
+    print('OK: the FTS5 index finds every product the LIKE scan matches')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,266 @@
+import base64
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from datetime import datetime, timezone
+from types import MappingProxyType
+
+# Stable listing orders for keyset pagination; the product id breaks ties
+SORT_KEYS = {
+    'id': lambda product: (product['id'],),
+    'price': lambda product: (product['price'], product['id']),
+    '-price': lambda product: (-product['price'], product['id']),
+    'rating': lambda product: (product['rating'] or 0, product['id']),
+    '-rating': lambda product: (-(product['rating'] or 0), product['id']),
+}
+
+
+def serialize(product):
+    """Encode a product exactly once, matching jsonify's key order"""
+    return json.dumps(product, sort_keys=True, separators=(',', ':')).encode()
+
+
+def public_fields(product):
+    """Client view of a product: in_stock instead of the raw stock count.
+
+    Cached bodies are only invalidated when a product goes in or out of
+    stock, so exact counts there would be stale after every order.
+    """
+    fields = {key: value for key, value in product.items() if key != 'stock'}
+    fields['in_stock'] = product['stock'] > 0
+    return fields
+
+
+def join_fragments(fragments):
+    """Stitch pre-serialized JSON objects into a JSON array body"""
+    return b'[' + b','.join(fragments) + b']'
+
+
+def flag_fragment(fragment, in_wishlist):
+    """Splice a per-user in_wishlist field into a serialized product"""
+    return (b'{"in_wishlist":true,' if in_wishlist else b'{"in_wishlist":false,') + fragment[1:]
+
+
+def encode_cursor(sort, key):
+    """Opaque cursor for the row a page ended on"""
+    return base64.urlsafe_b64encode(json.dumps([sort, *key]).encode()).decode()
+
+
+def decode_cursor(sort, cursor):
+    """Sort key of a cursor; ValueError if it is malformed or for another sort"""
+    try:
+        value = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(value, list) or not value or value[0] != sort:
+        raise ValueError('Cursor does not match sort order')
+    # Keys are compared and bound as SQL parameters; only accept scalars
+    if not all(isinstance(part, (str, int, float)) and not isinstance(part, bool)
+               for part in value[1:]):
+        raise ValueError('Invalid cursor')
+    return tuple(value[1:])
+
+
+class CatalogSnapshot:
+    """Immutable view of the products table at one catalog generation.
+
+    Besides the decoded dicts, every product is serialized to a JSON byte
+    fragment once per generation, and listing pages are stitched from those
+    fragments, so list endpoints never re-encode.
+    """
+
+    __slots__ = ('version', 'last_modified', 'products', 'by_id', 'by_category', 'deal_ids',
+                 'fragments', 'deals_memo', 'sort_indexes')
+
+    def __init__(self, version, rows, last_modified=None, extras=None):
+        products = []
+        by_category = {}
+        for row in rows:
+            product = dict(row)
+            product['specs'] = json.loads(product['specs']) if product.get('specs') else {}
+            if extras is not None:
+                product.update(extras(product))
+            products.append(product)
+            by_category.setdefault(product['category'], []).append(product)
+
+        self.version = version
+        self.last_modified = (last_modified or datetime.now(timezone.utc)).replace(microsecond=0)
+        self.products = tuple(products)
+        self.by_id = MappingProxyType({product['id']: product for product in products})
+        self.by_category = MappingProxyType(
+            {category: tuple(items) for category, items in by_category.items()})
+        # Compact id array of in-stock sale items; on_sale changes and items
+        # going in or out of stock bump the catalog generation, so this is
+        # rebuilt with the snapshot (other stock counts here may lag)
+        self.deal_ids = array('q', (product['id'] for product in products
+                                   if product['on_sale'] and product['stock'] > 0))
+        self.deals_memo = {}
+        self.sort_indexes = {}
+
+        self.fragments = MappingProxyType(
+            {product['id']: serialize(public_fields(product)) for product in products})
+
+    def listing(self, ids, wishlist_ids=None):
+        """JSON array of the given products, with in_wishlist flags if ``wishlist_ids`` is a set"""
+        if wishlist_ids is None:
+            return join_fragments(self.fragments[i] for i in ids)
+        return join_fragments(flag_fragment(self.fragments[i], i in wishlist_ids) for i in ids)
+
+    def sort_index(self, category, sort):
+        """Sorted (keys, ids) for one listing; built on first use per snapshot"""
+        index = self.sort_indexes.get((category, sort))
+        if index is None:
+            if category is not None and category not in self.by_category:
+                # Unknown categories come straight from the URL; never memoize them
+                return [], []
+            products = self.products if category is None else self.by_category[category]
+            key = SORT_KEYS[sort]
+            ordered = sorted(products, key=key)
+            index = ([key(product) for product in ordered], [product['id'] for product in ordered])
+            self.sort_indexes[(category, sort)] = index
+        return index
+
+
+class CatalogCache:
+    """Read-through, in-process cache of the product catalog.
+
+    A dedicated read-only connection polls ``PRAGMA data_version``, which
+    changes whenever another connection (or process) commits. Only then is
+    the trigger-maintained ``catalog_meta.generation`` counter read, so cart
+    and wishlist writes do not force a catalog reload. The product dicts
+    handed out are shared between requests and must not be mutated.
+
+    ``extras(product)``, if given, returns derived fields (such as image
+    variant URLs) merged into each product when a snapshot is built.
+    """
+
+    def __init__(self, database, extras=None):
+        self.database = database
+        self.extras = extras
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._pid = None
+        self._conn = None
+        self._data_version = None
+        self._generation = None
+        self._snapshot = None
+
+    def _connection(self):
+        if self._conn is None or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._conn = sqlite3.connect(self.database, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._data_version = None
+        return self._conn
+
+    def _read_meta(self, conn):
+        """(generation, last modified) of the catalog"""
+        try:
+            generation, updated_at = conn.execute(
+                'SELECT generation, updated_at FROM catalog_meta WHERE id = 1').fetchone()
+        except sqlite3.OperationalError:
+            # Older databases without catalog_meta: any commit invalidates
+            return self._data_version, None
+        updated_at = datetime.strptime(updated_at, '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+        return generation, updated_at
+
+    def snapshot(self):
+        """Return the current snapshot, reloading it if the catalog changed"""
+        with self._lock:
+            conn = self._connection()
+            data_version = conn.execute('PRAGMA data_version').fetchone()[0]
+
+            if self._snapshot is not None and data_version == self._data_version:
+                self.hits += 1
+                return self._snapshot
+
+            self._data_version = data_version
+            generation, updated_at = self._read_meta(conn)
+            if self._snapshot is not None and generation == self._generation:
+                self.hits += 1
+                return self._snapshot
+
+            self.misses += 1
+            rows = conn.execute('SELECT * FROM products ORDER BY id').fetchall()
+            self._generation = generation
+            self._snapshot = CatalogSnapshot(generation, rows, updated_at, self.extras)
+            return self._snapshot
+
+    def invalidate(self):
+        """Force a reload on the next access"""
+        with self._lock:
+            self._snapshot = None
+
+    # Convenience accessors used by the API routes
+    def all_products(self):
+        return self.snapshot().products
+
+    def get(self, product_id):
+        return self.snapshot().by_id.get(product_id)
+
+    def by_category(self, category):
+        return self.snapshot().by_category.get(category, ())
+
+    def deals_json(self, count=10, bucket_seconds=0, wishlist_ids=None):
+        """JSON body of ``count`` random deals and how long it may be cached.
+
+        With ``bucket_seconds`` the draw is seeded by the time bucket, so every
+        request in the same bucket gets the same (memoized) selection and the
+        response can carry a matching max-age.
+        """
+        snapshot = self.snapshot()
+        k = min(count, len(snapshot.deal_ids))
+
+        if bucket_seconds <= 0:
+            ids = random.sample(snapshot.deal_ids, k)
+            return snapshot.listing(ids, wishlist_ids), 0
+
+        now = time.time()
+        bucket = int(now // bucket_seconds)
+        max_age = int(bucket_seconds - now % bucket_seconds)
+        memo = snapshot.deals_memo.get((bucket, count))
+        if memo is None:
+            ids = random.Random(f'{snapshot.version}:{bucket}').sample(snapshot.deal_ids, k)
+            memo = (ids, snapshot.listing(ids))
+            # Only the current bucket is ever requested again
+            snapshot.deals_memo.clear()
+            snapshot.deals_memo[(bucket, count)] = memo
+        ids, body = memo
+        if wishlist_ids is not None:
+            body = snapshot.listing(ids, wishlist_ids)
+        return body, max_age
+
+    def product_json(self, product_id):
+        return self.snapshot().fragments.get(product_id)
+
+    def page_json(self, category, sort, limit, after=None, wishlist_ids=None):
+        """One keyset page as a ``{"next_cursor", "products"}`` JSON body.
+
+        The cursor is located by bisection in the snapshot's sorted index,
+        so a deep page costs the same as the first.
+        """
+        snapshot = self.snapshot()
+        keys, ids = snapshot.sort_index(category, sort)
+        try:
+            start = bisect_right(keys, decode_cursor(sort, after)) if after else 0
+        except TypeError:
+            raise ValueError('Invalid cursor')
+        end = start + limit
+
+        next_cursor = encode_cursor(sort, keys[end - 1]) if end < len(ids) else None
+        products = snapshot.listing(ids[start:end], wishlist_ids)
+        return b'{"next_cursor":' + json.dumps(next_cursor).encode() + b',"products":' + products + b'}'
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'version': self._generation,
+            'products': len(self._snapshot.products) if self._snapshot else 0,
+        }
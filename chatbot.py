@@ -0,0 +1,211 @@
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Keyword rules in priority order: the first rule with any keyword contained
+# in the (lower-cased) message wins. Keywords match as plain substrings.
+RULES = [
+    ('greeting', ['hello', 'hi', 'hey', 'greeting']),
+    ('help', ['help', 'what can you do', 'assist']),
+    ('smartphones', ['phone', 'smartphone', 'iphone', 'samsung', 'mobile']),
+    ('laptops', ['laptop', 'macbook', 'notebook', 'computer']),
+    ('headphones', ['headphone', 'headset', 'earphone']),
+    ('earbuds', ['earbud', 'airpod', 'wireless earbud']),
+    ('price', ['price', 'cost', 'how much', 'expensive']),
+    ('delivery', ['delivery', 'shipping', 'deliver', 'ship']),
+    ('return', ['return', 'refund', 'exchange', 'warranty']),
+    ('contact', ['contact', 'email', 'phone', 'address', 'call']),
+    ('budget phone', ['budget', 'cheap', 'affordable', 'economical']),
+    ('camera phone', ['camera', 'photo', 'picture', 'photography']),
+    ('battery', ['battery', 'charge', 'power', 'backup']),
+    ('storage', ['storage', 'memory', 'gb', 'space']),
+]
+
+# Categories answered from the live catalog when products match the message
+PRODUCT_TOPICS = frozenset({
+    'smartphones', 'laptops', 'headphones', 'earbuds', 'price',
+    'budget phone', 'camera phone', 'battery', 'storage', 'default',
+})
+
+# Canned answers per rule category ('default' when nothing matches)
+RESPONSES = {
+    'greeting': [
+        "Hello! 👋 I'm your AI shopping assistant. How can I help you today?",
+        "Hi there! Welcome to TechStore. How can I assist you?",
+        "Greetings! I'm here to help you with your shopping needs."
+    ],
+    'help': [
+        "I can help you with: • Product information • Category details • Price & deals • Delivery info • Return policy",
+        "I can assist you with: 1. Finding products 2. Checking prices 3. Delivery information 4. Return policies"
+    ],
+    'smartphones': [
+        "We have a wide range of smartphones from Apple, Samsung, OnePlus, Google, and more. Check our smartphone category for the latest models!",
+        "Looking for smartphones? We have iPhones, Samsung Galaxy, Google Pixel, and other premium brands with various price ranges."
+    ],
+    'laptops': [
+        "We offer laptops for every need: MacBook for professionals, gaming laptops from Asus and MSI, and ultrabooks from Dell and HP.",
+        "Browse our laptop collection featuring MacBooks, Dell XPS, HP Spectre, gaming laptops, and budget-friendly options."
+    ],
+    'headphones': [
+        "We have noise-cancelling headphones from Sony and Bose, premium audio from Sennheiser, and gaming headsets.",
+        "Check out our headphone selection including Sony WH-1000XM5, Bose QC45, Apple AirPods Max, and more!"
+    ],
+    'earbuds': [
+        "Our earbuds collection includes Apple AirPods Pro, Sony WF-1000XM5, Samsung Galaxy Buds, and Bose QuietComfort.",
+        "We have true wireless earbuds from top brands with features like noise cancellation and long battery life."
+    ],
+    'price': [
+        "Prices vary by product and specifications. You can check individual product pages for current prices and deals.",
+        "We offer competitive prices across all categories. Check our deals section for special offers!"
+    ],
+    'delivery': [
+        "We offer free shipping on orders above ₹5000. Delivery usually takes 3-7 business days across India.",
+        "Standard delivery: 5-7 days • Express delivery: 2-3 days (extra charges apply) • Free shipping on orders above ₹5000"
+    ],
+    'return': [
+        "We have a 10-day return policy for unused products in original packaging. Refunds are processed within 5-7 business days.",
+        "Returns are accepted within 10 days of delivery. Products must be unused with original packaging and accessories."
+    ],
+    'contact': [
+        "You can contact us at: • Phone: 1800-123-4567 • Email: support@techstore.com • Address: 123 Tech Street, Mumbai",
+        "Reach us at support@techstore.com or call 1800-123-4567. We're available 9 AM to 8 PM, Monday to Saturday."
+    ],
+    'budget phone': [
+        "For budget smartphones, check out Nothing Phone 2 (₹44,999) or OnePlus 11 5G (₹56,999). Great value for money!",
+        "Best budget options: Nothing Phone 2 (₹44,999) offers great features at an affordable price."
+    ],
+    'camera phone': [
+        "For best camera: iPhone 15 Pro (₹1,29,999), Samsung S23 Ultra (₹1,24,999), or Google Pixel 8 Pro (₹1,06,999).",
+        "Top camera phones: Samsung S23 Ultra with 200MP camera or iPhone 15 Pro with advanced photography features."
+    ],
+    'battery': [
+        "For long battery life: Samsung S23 Ultra (5000mAh), OnePlus 11 (5000mAh), or iPhone 15 Pro (3274mAh).",
+        "Best battery life in smartphones: Samsung Galaxy series and OnePlus models typically have large batteries."
+    ],
+    'storage': [
+        "Most smartphones come with 128GB, 256GB, or 512GB storage options. Some high-end models offer 1TB.",
+        "Storage options vary: Entry-level: 128GB • Mid-range: 256GB • Premium: 512GB-1TB • Choose based on your needs."
+    ],
+    'default': [
+        "I'm not sure I understand. Could you rephrase your question?",
+        "I'm here to help with shopping queries. Try asking about products, prices, or delivery!",
+        "Please ask me about our products, categories, prices, or store policies."
+    ]
+}
+
+
+def _trie_pattern(node):
+    """Regex for a character trie; optional suffixes are greedy, so the
+    longest keyword starting at a position is the one reported"""
+    branches = [re.escape(char) + _trie_pattern(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+    body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    return f'(?:{body})?' if '' in node else body
+
+
+def compile_rules(rules):
+    """Compile the rule table into one matcher that finds every hit in one pass.
+
+    All keywords go into a single trie-shaped regex wrapped in a lookahead,
+    so findall() reports the longest keyword starting at every position of
+    the message. Each keyword is mapped to the best (lowest) rule index of
+    any keyword it contains, which accounts for shorter keywords hidden
+    inside longer ones ('phone' in 'headphone', 'hi' in 'shipping'), so the
+    result is exactly the first rule of the original if/elif chain.
+
+    Returns (pattern, {keyword: rule index}).
+    """
+    first_rule = {}
+    trie = {}
+    for index, (_, keywords) in enumerate(rules):
+        for keyword in keywords:
+            first_rule.setdefault(keyword, index)
+            node = trie
+            for char in keyword:
+                node = node.setdefault(char, {})
+            node[''] = True
+
+    priority = {
+        keyword: min(index for other, index in first_rule.items() if other in keyword)
+        for keyword in first_rule
+    }
+    return re.compile('(?=(' + _trie_pattern(trie) + '))'), priority
+
+
+class Chatbot:
+    """Rule-based chatbot backed by a single precompiled matcher.
+
+    If ``rules_file`` is given (JSON with "rules": [[category, [keywords]]]
+    and "responses": {category: [answers]}), it is re-read whenever its
+    modification time changes, checked at most every ``check_interval``
+    seconds, so rules can be edited without a restart.
+    """
+
+    def __init__(self, rules=RULES, responses=RESPONSES, rules_file=None, check_interval=2.0):
+        self.rules_file = rules_file
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._next_check = 0.0
+        self.load(rules, responses)
+
+    def load(self, rules, responses):
+        """Swap in a new rule table; safe to call while requests are served"""
+        categories = [category for category, _ in rules]
+        missing = [category for category in categories + ['default'] if category not in responses]
+        if missing:
+            raise ValueError(f"No responses for: {', '.join(missing)}")
+        pattern, priority = compile_rules(rules)
+        self._state = (pattern, priority, categories, responses)
+
+    def reload(self):
+        """Re-read rules_file now"""
+        with open(self.rules_file, encoding='utf-8') as f:
+            data = json.load(f)
+        self.load([tuple(rule) for rule in data['rules']], data['responses'])
+        self._mtime = os.path.getmtime(self.rules_file)
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if not self.rules_file or now < self._next_check:
+            return
+        with self._lock:
+            if now < self._next_check:
+                return
+            self._next_check = now + self.check_interval
+            try:
+                mtime = os.path.getmtime(self.rules_file)
+            except OSError:
+                mtime = None
+            if mtime == self._mtime:
+                return
+            # Remember failed attempts too, so a broken file is reported once
+            # per change instead of on every check
+            self._mtime = mtime
+            try:
+                self.reload()
+            except (OSError, ValueError, KeyError) as e:
+                # Keep serving the last good rules
+                logger.warning('Chatbot rules reload failed: %s', e)
+
+    def classify(self, message):
+        """Category of the highest-priority rule hit in the message"""
+        self._maybe_reload()
+        pattern, priority, categories, _ = self._state
+        hits = pattern.findall(message)
+        if not hits:
+            return 'default'
+        return categories[min(priority[keyword] for keyword in hits)]
+
+    def reply(self, message):
+        """(category, response) for an already lower-cased message"""
+        category = self.classify(message)
+        _, _, _, responses = self._state
+        return category, random.choice(responses[category])
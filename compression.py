@@ -0,0 +1,79 @@
+import gzip
+import threading
+
+
+class GzipCompressor:
+    """Gzips eligible responses in an after_request hook.
+
+    Only responses whose mimetype is in ``mimetypes`` and whose body is at
+    least ``min_size`` bytes are compressed, and only for clients that
+    accept gzip. Streamed, passthrough (send_file) and already-encoded
+    responses are left alone. For gzip clients a strong ETag is weakened,
+    since the compressed body is a different byte sequence with the same
+    meaning; a 304 of an eligible mimetype gets the same ETag and Vary as
+    the 200 it revalidates.
+    """
+
+    def __init__(self, level=6, min_size=1024, mimetypes=('application/json',)):
+        self.level = level
+        self.min_size = min_size
+        self.mimetypes = frozenset(mimetypes)
+        self.compressed = 0
+        self.skipped = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._lock = threading.Lock()
+
+    def _eligible(self, response, accept_encodings):
+        return (
+            response.status_code in (200, 304)
+            and response.mimetype in self.mimetypes
+            and 'Content-Encoding' not in response.headers
+            and not response.direct_passthrough
+            and not response.is_streamed
+            and accept_encodings.quality('gzip') > 0
+        )
+
+    def compress(self, response, accept_encodings):
+        """Compress ``response`` in place if worthwhile; returns it"""
+        if not self._eligible(response, accept_encodings):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        # Weakened whether or not this body ends up compressed, so 200s and
+        # 304s (which have no body to measure) always agree
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        if response.status_code == 304:
+            return response
+
+        data = response.get_data()
+        if len(data) < self.min_size:
+            with self._lock:
+                self.skipped += 1
+            return response
+
+        body = gzip.compress(data, compresslevel=self.level, mtime=0)
+        if len(body) >= len(data):
+            with self._lock:
+                self.skipped += 1
+            return response
+
+        response.set_data(body)
+        response.content_encoding = 'gzip'
+
+        with self._lock:
+            self.compressed += 1
+            self.bytes_in += len(data)
+            self.bytes_out += len(body)
+        return response
+
+    def stats(self):
+        return {
+            'compressed': self.compressed,
+            'skipped': self.skipped,
+            'bytes_in': self.bytes_in,
+            'bytes_out': self.bytes_out,
+            'bytes_saved': self.bytes_in - self.bytes_out,
+        }
@@ -1,9 +1,378 @@
 import sqlite3
 import json
-from datetime import datetime
+import random
+import time
+from datetime import datetime, timedelta
+from itertools import islice
 
-def create_database():
-    conn = sqlite3.connect('database.db')
+from chatbot import RESPONSES, Chatbot
+from passwords import hash_password
+
+SAMPLE_PASSWORD = 'password123'
+
+# Secondary indexes, created after the data is loaded (cheaper than
+# maintaining them row by row during a bulk insert)
+INDEXES = (
+    # Covers the cart listing join (user_id -> product_id, quantity) without
+    # touching the table; the UNIQUE index on cart already covers wishlist reads
+    'CREATE INDEX idx_cart_user_product_quantity ON cart (user_id, product_id, quantity)',
+    # Order history is read newest-first per user (keyset on created_at, id)
+    'CREATE INDEX idx_orders_user_created ON orders (user_id, created_at)',
+    'CREATE INDEX idx_order_items_order ON order_items (order_id)',
+)
+
+# products columns whose changes listings, ETags and search must see; stock
+# is handled separately (see create_triggers)
+PRODUCT_CONTENT_COLUMNS = 'name, category, price, description, specs, image, on_sale, rating'
+
+# Real per-user cart/wishlist counts, used to rebuild user_stats
+USER_COUNTS_SQL = '''
+    SELECT user_id, SUM(cart_count), SUM(wishlist_count) FROM (
+        SELECT user_id, COUNT(*) AS cart_count, 0 AS wishlist_count FROM cart GROUP BY user_id
+        UNION ALL
+        SELECT user_id, 0, COUNT(*) FROM wishlist GROUP BY user_id
+    ) GROUP BY user_id
+'''
+
+# --scale loads: no rollback journal or fsyncs (a failed load is simply
+# re-run) and a big page cache for the index builds at the end
+BULK_PRAGMAS = (
+    'PRAGMA journal_mode = OFF',
+    'PRAGMA synchronous = OFF',
+    'PRAGMA locking_mode = EXCLUSIVE',
+    'PRAGMA temp_store = MEMORY',
+    'PRAGMA cache_size = -262144',
+)
+SEED_CHUNK = 50000
+
+# Per-category templates for generated products; names are
+# "<brand> <series> <number><suffix>", specs are drawn key by key
+SCALE_CATALOG = {
+    'Smartphones': {
+        'series': [('Apple', 'iPhone'), ('Samsung', 'Galaxy S'), ('Samsung', 'Galaxy A'),
+                   ('OnePlus', 'Nord'), ('Google', 'Pixel'), ('Xiaomi', 'Redmi Note'),
+                   ('Nothing', 'Phone'), ('Vivo', 'X'), ('Realme', 'GT')],
+        'suffixes': ['', ' Pro', ' Pro Max', ' Ultra', ' Lite', ' 5G', ' Plus'],
+        'specs': {
+            'ram': ['6GB', '8GB', '12GB', '16GB'],
+            'storage': ['128GB', '256GB', '512GB', '1TB'],
+            'camera': ['50MP Main + 12MP Ultra Wide', '48MP Main + 12MP Ultra Wide + 12MP Telephoto',
+                       '108MP Main + 8MP Ultra Wide', '200MP Main + 12MP Ultra Wide + 10MP Telephoto'],
+            'battery': ['4500 mAh', '5000 mAh', '5500 mAh', '6000 mAh'],
+            'display': ['6.1-inch OLED', '6.4-inch AMOLED 120Hz', '6.7-inch LTPO AMOLED',
+                        '6.8-inch Dynamic AMOLED 2X'],
+            'processor': ['A17 Pro', 'Snapdragon 8 Gen 2', 'Dimensity 9200', 'Tensor G3', 'Snapdragon 7 Gen 1'],
+        },
+        'descriptions': ['Flagship camera system with all-day battery', 'Fast charging and a smooth 120Hz display',
+                         'Compact phone with pro-grade performance', 'Great value 5G smartphone'],
+        'price': (9999, 159999),
+        'images': 'phone{}.png',
+    },
+    'Laptops': {
+        'series': [('Apple', 'MacBook Air'), ('Apple', 'MacBook Pro'), ('Dell', 'XPS'), ('Dell', 'Inspiron'),
+                   ('HP', 'Spectre x360'), ('HP', 'Pavilion'), ('Lenovo', 'ThinkPad X'), ('Lenovo', 'Yoga'),
+                   ('Asus', 'ROG Zephyrus G'), ('Acer', 'Swift'), ('MSI', 'Creator Z')],
+        'suffixes': ['', ' OLED', ' Gen 2', ' Studio', ' Plus', ' 2-in-1'],
+        'specs': {
+            'ram': ['8GB', '16GB', '32GB', '64GB'],
+            'storage': ['256GB SSD', '512GB SSD', '1TB SSD', '2TB SSD'],
+            'display': ['13.3-inch FHD', '14-inch 2.8K OLED', '15.6-inch FHD 144Hz', '16-inch 3.2K Mini LED'],
+            'processor': ['Intel Core i5-1340P', 'Intel Core i7-13700H', 'AMD Ryzen 7 7840HS', 'Apple M2',
+                          'Apple M3 Pro', 'Intel Core i9-13900H'],
+            'graphics': ['Integrated', 'NVIDIA RTX 4050', 'NVIDIA RTX 4070', 'AMD Radeon 780M'],
+            'battery': ['Up to 10 hours', 'Up to 14 hours', 'Up to 18 hours', 'Up to 22 hours'],
+        },
+        'descriptions': ['Thin and light for work on the go', 'Creator laptop with a colour-accurate display',
+                         'Gaming performance in a portable chassis', 'Everyday laptop with long battery life'],
+        'price': (34990, 349990),
+        'images': 'laptop{}.png',
+    },
+    'Headphones': {
+        'series': [('Sony', 'WH-1000XM'), ('Bose', 'QuietComfort'), ('Sennheiser', 'Momentum'),
+                   ('Apple', 'AirPods Max'), ('JBL', 'Tour One M'), ('Beats', 'Studio'),
+                   ('Audio-Technica', 'ATH-M'), ('Marshall', 'Monitor')],
+        'suffixes': ['', ' Pro', ' II', ' Wireless', ' ANC'],
+        'specs': {
+            'type': ['Over-ear', 'On-ear'],
+            'battery': ['20 hours', '30 hours', '40 hours', '60 hours'],
+            'noise_cancellation': ['Yes', 'No'],
+            'wireless': ['Yes', 'No'],
+            'microphone': ['Yes', 'No'],
+            'bluetooth': ['5.0', '5.2', '5.3'],
+        },
+        'descriptions': ['Industry-leading noise cancellation', 'Studio sound with deep, punchy bass',
+                         'Comfortable all-day listening', 'Hi-Res audio with spatial sound'],
+        'price': (2999, 59900),
+        'images': 'headphone{}.png',
+    },
+    'Earbuds': {
+        'series': [('Apple', 'AirPods'), ('Sony', 'WF-1000XM'), ('Samsung', 'Galaxy Buds'),
+                   ('Bose', 'QuietComfort Earbuds'), ('Jabra', 'Elite'), ('Google', 'Pixel Buds'),
+                   ('OnePlus', 'Buds'), ('Nothing', 'Ear')],
+        'suffixes': ['', ' Pro', ' Pro 2', ' Lite', ' Sport'],
+        'specs': {
+            'type': ['In-ear'],
+            'battery': ['5 hours (20 with case)', '6 hours (24 with case)', '6 hours (30 with case)',
+                        '8 hours (36 with case)'],
+            'noise_cancellation': ['Yes', 'No'],
+            'wireless': ['Yes'],
+            'microphone': ['Yes'],
+            'bluetooth': ['5.2', '5.3', '5.4'],
+        },
+        'descriptions': ['Active Noise Cancellation with Transparency mode', 'Secure fit for workouts',
+                         'Crystal-clear calls with six microphones', 'Pocketable earbuds with rich sound'],
+        'price': (1499, 29990),
+        'images': 'ear{}.png',
+    },
+}
+
+FIRST_NAMES = ['Aarav', 'Vivaan', 'Aditya', 'Arjun', 'Sai', 'Rohan', 'Ishaan', 'Kabir', 'Ananya', 'Diya',
+               'Priya', 'Saanvi', 'Aditi', 'Kavya', 'Meera', 'Neha', 'Rahul', 'Vikram', 'Pooja', 'Sneha']
+LAST_NAMES = ['Sharma', 'Verma', 'Patel', 'Reddy', 'Iyer', 'Nair', 'Gupta', 'Singh', 'Kumar', 'Das',
+              'Mehta', 'Joshi', 'Rao', 'Banerjee', 'Kulkarni', 'Chopra']
+STREETS = ['MG Road', 'Park Street', 'Linking Road', 'Brigade Road', 'Anna Salai', 'FC Road', 'Ring Road']
+CITIES = [('Mumbai', 'Maharashtra', '400001'), ('Pune', 'Maharashtra', '411001'), ('Delhi', 'Delhi', '110001'),
+          ('Bengaluru', 'Karnataka', '560001'), ('Chennai', 'Tamil Nadu', '600001'),
+          ('Kolkata', 'West Bengal', '700001'), ('Hyderabad', 'Telangana', '500001')]
+CHAT_MESSAGES = ['hi', 'what is your return policy', 'best phone under 50000', 'do you deliver to pune',
+                 'laptop with 16gb ram', 'where is my order', 'noise cancelling headphones',
+                 'payment options', 'thank you']
+ORDER_STATUSES = ['pending', 'shipped', 'delivered', 'delivered', 'delivered', 'cancelled']
+
+def create_indexes(cursor):
+    for statement in INDEXES:
+        cursor.execute(statement)
+
+def create_triggers(cursor):
+    """Triggers keeping user_stats, catalog_meta and products_fts in sync"""
+    for table, column in (('cart', 'cart_count'), ('wishlist', 'wishlist_count')):
+        cursor.execute(f'''
+        CREATE TRIGGER {table}_insert_stats AFTER INSERT ON {table}
+        BEGIN
+            INSERT INTO user_stats (user_id, {column}) VALUES (new.user_id, 1)
+            ON CONFLICT (user_id) DO UPDATE SET {column} = {column} + 1;
+        END
+        ''')
+        cursor.execute(f'''
+        CREATE TRIGGER {table}_delete_stats AFTER DELETE ON {table}
+        BEGIN
+            UPDATE user_stats SET {column} = {column} - 1 WHERE user_id = old.user_id;
+        END
+        ''')
+        cursor.execute(f'''
+        CREATE TRIGGER {table}_move_stats AFTER UPDATE OF user_id ON {table}
+        BEGIN
+            UPDATE user_stats SET {column} = {column} - 1 WHERE user_id = old.user_id;
+            INSERT INTO user_stats (user_id, {column}) VALUES (new.user_id, 1)
+            ON CONFLICT (user_id) DO UPDATE SET {column} = {column} + 1;
+        END
+        ''')
+    
+    # Bump the catalog generation for anything listings show. Plain stock
+    # decrements from checkout only matter to the catalog when an item goes in
+    # or out of stock (deals, in_stock), so those leave the snapshot alone
+    for name, event in (('insert', 'INSERT'), ('delete', 'DELETE'),
+                        ('update', f'UPDATE OF {PRODUCT_CONTENT_COLUMNS}'),
+                        ('stock', 'UPDATE OF stock')):
+        condition = 'WHEN (old.stock > 0) != (new.stock > 0)' if name == 'stock' else ''
+        cursor.execute(f'''
+        CREATE TRIGGER products_{name}_generation AFTER {event} ON products {condition}
+        BEGIN
+            UPDATE catalog_meta
+            SET generation = generation + 1, updated_at = CURRENT_TIMESTAMP
+            WHERE id = 1;
+        END
+        ''')
+    
+    cursor.execute('''
+    CREATE TRIGGER products_fts_insert AFTER INSERT ON products
+    BEGIN
+        INSERT INTO products_fts (rowid, name, category, description, specs)
+        VALUES (new.id, new.name, new.category, new.description, new.specs);
+    END
+    ''')
+    
+    cursor.execute('''
+    CREATE TRIGGER products_fts_delete AFTER DELETE ON products
+    BEGIN
+        INSERT INTO products_fts (products_fts, rowid, name, category, description, specs)
+        VALUES ('delete', old.id, old.name, old.category, old.description, old.specs);
+    END
+    ''')
+    
+    cursor.execute('''
+    CREATE TRIGGER products_fts_update AFTER UPDATE OF name, category, description, specs ON products
+    BEGIN
+        INSERT INTO products_fts (products_fts, rowid, name, category, description, specs)
+        VALUES ('delete', old.id, old.name, old.category, old.description, old.specs);
+        INSERT INTO products_fts (rowid, name, category, description, specs)
+        VALUES (new.id, new.name, new.category, new.description, new.specs);
+    END
+    ''')
+
+def rebuild_derived(cursor):
+    """Repopulate the FTS index and user_stats from the base tables"""
+    cursor.execute("INSERT INTO products_fts (products_fts) VALUES ('rebuild')")
+    cursor.execute('DELETE FROM user_stats')
+    cursor.execute(f'INSERT INTO user_stats (user_id, cart_count, wishlist_count) {USER_COUNTS_SQL}')
+    cursor.execute('UPDATE catalog_meta SET generation = generation + 1, updated_at = CURRENT_TIMESTAMP')
+
+def user_address(i):
+    """(address, pincode) of generated user ``i``; also used as order shipping address"""
+    city, state, pincode = CITIES[i % len(CITIES)]
+    return f"{i % 400 + 1} {STREETS[i % len(STREETS)]}, {city}, {state}", pincode
+
+def generate_products(count, rng):
+    templates = []
+    for category, template in SCALE_CATALOG.items():
+        # A pool of spec combinations per category, serialized once
+        specs = [json.dumps({key: rng.choice(values) for key, values in template['specs'].items()})
+                 for _ in range(256)]
+        low, high = template['price']
+        templates.append((category, template['series'], template['suffixes'], template['descriptions'], specs,
+                          [template['images'].format(n) for n in range(1, 9)], low // 100, high // 100 - low // 100))
+    
+    # rng.random() arithmetic instead of choice()/randint(): this loop is the
+    # bulk of the time spent generating a large catalog
+    random_ = rng.random
+    for _ in range(count):
+        category, series, suffixes, descriptions, specs, images, low, span = templates[int(random_() * len(templates))]
+        brand, name = series[int(random_() * len(series))]
+        yield (
+            f"{brand} {name} {int(random_() * 30) + 1}{suffixes[int(random_() * len(suffixes))]}",
+            category,
+            float((low + int(random_() * span)) * 100 + 99),
+            descriptions[int(random_() * len(descriptions))],
+            specs[int(random_() * len(specs))],
+            images[int(random_() * len(images))],
+            int(random_() * 201),
+            random_() < 0.3,
+            round(3.5 + random_() * 1.5, 1),
+        )
+
+def generate_users(count, first_id, password_hash, rng):
+    for i in range(first_id, first_id + count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        address, pincode = user_address(i)
+        # Phones from 8000000000 up cannot collide with the sample user's
+        yield (f'{first} {last}', f'{first}.{last}.{i}@example.com'.lower(), str(8000000000 + i),
+               address, pincode, password_hash)
+
+def generate_items(user_ids, per_user, product_ids, rng, quantity=False):
+    """Cart (with quantity) or wishlist rows: ``per_user`` distinct products per user"""
+    random_ = rng.random
+    for user_id in user_ids:
+        for product_id in rng.sample(product_ids, per_user):
+            yield (user_id, product_id, int(random_() * 3) + 1) if quantity else (user_id, product_id)
+
+def recent_days(days):
+    """Date strings for today and the ``days - 1`` days before it, newest first"""
+    today = datetime.now().date()
+    return [f'{today - timedelta(days=n):%Y-%m-%d}' for n in range(days)]
+
+def generate_orders(count, user_ids, products, rng, items):
+    """Order rows over the last two years; their order_items rows are appended to ``items``"""
+    days = recent_days(730)
+    random_ = rng.random
+    for order_id in range(1, count + 1):
+        user_id = user_ids[int(random_() * len(user_ids))]
+        lines = []
+        for product_id in rng.sample(range(1, len(products)), int(random_() * 4) + 1):
+            name, price = products[product_id]
+            lines.append({'product_id': product_id, 'name': name, 'quantity': int(random_() * 2) + 1, 'price': price})
+        items.extend((order_id, line['product_id'], line['quantity'], line['price']) for line in lines)
+        day = days[int(random_() * len(days))]
+        address, pincode = user_address(user_id)
+        yield (order_id, f"ORD{day.replace('-', '')}{order_id:08X}", user_id, json.dumps(lines),
+               sum(line['price'] * line['quantity'] for line in lines), f'{address}, {pincode}',
+               ('cod', 'upi', 'card')[int(random_() * 3)], ORDER_STATUSES[int(random_() * len(ORDER_STATUSES))],
+               f'{day} {int(random_() * 24):02d}:{int(random_() * 60):02d}:{int(random_() * 60):02d}')
+
+def generate_chat_logs(count, user_ids, rng):
+    # classify() plus our own draw: reply() picks its answer with the global random
+    chatbot = Chatbot()
+    replies = [(message, RESPONSES[chatbot.classify(message)]) for message in CHAT_MESSAGES]
+    days = recent_days(90)
+    random_ = rng.random
+    for _ in range(count):
+        message, responses = replies[int(random_() * len(replies))]
+        response = responses[int(random_() * len(responses))]
+        # Guests are logged as user 0, like the chatbot endpoint does
+        user_id = user_ids[int(random_() * len(user_ids))] if random_() < 0.7 else 0
+        day = days[int(random_() * len(days))]
+        yield (user_id, message, response,
+               f'{day} {int(random_() * 24):02d}:{int(random_() * 60):02d}:{int(random_() * 60):02d}')
+
+def bulk_insert(conn, label, sql, rows):
+    """executemany in SEED_CHUNK-sized batches inside one transaction; prints the rate"""
+    start = time.perf_counter()
+    total = 0
+    with conn:
+        while True:
+            chunk = list(islice(rows, SEED_CHUNK))
+            if not chunk:
+                break
+            conn.executemany(sql, chunk)
+            total += len(chunk)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<12}{total:>12,} rows in {elapsed:6.1f}s ({total / max(elapsed, 1e-9):>12,.0f} rows/s)")
+    return total
+
+def seed_scale(conn, products, users=None, cart_items=5, wishlist_items=5, orders=None, chat_logs=None, seed=42):
+    """Load generated products, users, carts, wishlists, orders and chat logs.
+    
+    Deterministic for a given ``seed``. Runs before indexes and triggers exist;
+    create_database() builds those (and the derived tables) afterwards.
+    """
+    users = products // 2 if users is None else users
+    orders = users if orders is None else orders
+    chat_logs = users if chat_logs is None else chat_logs
+    rng = random.Random(seed)
+    
+    for pragma in BULK_PRAGMAS:
+        conn.execute(pragma)
+    
+    print(f"Seeding at scale (seed {seed}):")
+    bulk_insert(conn, 'products', '''
+        INSERT INTO products (name, category, price, description, specs, image, stock, on_sale, rating)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', generate_products(products, rng))
+    
+    first_id = conn.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM users').fetchone()[0]
+    # One shared hash: scrypt per user would dominate the load time
+    bulk_insert(conn, 'users', '''
+        INSERT INTO users (full_name, email, phone, address, pincode, password)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', generate_users(users, first_id, hash_password(SAMPLE_PASSWORD), rng))
+    
+    user_ids = range(first_id, first_id + users)
+    product_ids = range(1, conn.execute('SELECT MAX(id) FROM products').fetchone()[0] + 1)
+    if user_ids:
+        bulk_insert(conn, 'cart', 'INSERT INTO cart (user_id, product_id, quantity) VALUES (?, ?, ?)',
+                    generate_items(user_ids, min(cart_items, len(product_ids)), product_ids, rng, quantity=True))
+        bulk_insert(conn, 'wishlist', 'INSERT INTO wishlist (user_id, product_id) VALUES (?, ?)',
+                    generate_items(user_ids, min(wishlist_items, len(product_ids)), product_ids, rng))
+        
+        # Index = product id; names and prices are copied into each order
+        catalog = [None] + [(name, price) for name, price in
+                            conn.execute('SELECT name, price FROM products ORDER BY id')]
+        items = []
+        bulk_insert(conn, 'orders', '''
+            INSERT INTO orders (id, order_id, user_id, products, total_amount, shipping_address,
+                                payment_method, status, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', generate_orders(orders, user_ids, catalog, rng, items))
+        bulk_insert(conn, 'order_items',
+                    'INSERT INTO order_items (order_id, product_id, quantity, price) VALUES (?, ?, ?, ?)',
+                    iter(items))
+        bulk_insert(conn, 'chatbot_logs',
+                    'INSERT INTO chatbot_logs (user_id, message, response, timestamp) VALUES (?, ?, ?, ?)',
+                    generate_chat_logs(chat_logs, user_ids, rng))
+
+def create_database(database='database.db', scale=None):
+    """Create the schema and sample data; ``scale`` (seed_scale() keyword
+    arguments) adds generated data on top"""
+    conn = sqlite3.connect(database)
     cursor = conn.cursor()
     
     # Drop tables if they exist (for clean recreation)
@@ -11,8 +380,12 @@ def create_database():
     cursor.execute('DROP TABLE IF EXISTS products')
     cursor.execute('DROP TABLE IF EXISTS cart')
     cursor.execute('DROP TABLE IF EXISTS wishlist')
+    cursor.execute('DROP TABLE IF EXISTS order_items')
     cursor.execute('DROP TABLE IF EXISTS orders')
     cursor.execute('DROP TABLE IF EXISTS chatbot_logs')
+    cursor.execute('DROP TABLE IF EXISTS catalog_meta')
+    cursor.execute('DROP TABLE IF EXISTS products_fts')
+    cursor.execute('DROP TABLE IF EXISTS user_stats')
     
     # Create users table
     cursor.execute('''
@@ -53,6 +426,7 @@ def create_database():
         product_id INTEGER NOT NULL,
         quantity INTEGER DEFAULT 1,
         added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE (user_id, product_id),
         FOREIGN KEY (user_id) REFERENCES users(id),
         FOREIGN KEY (product_id) REFERENCES products(id)
     )
@@ -65,6 +439,7 @@ def create_database():
         user_id INTEGER NOT NULL,
         product_id INTEGER NOT NULL,
         added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE (user_id, product_id),
         FOREIGN KEY (user_id) REFERENCES users(id),
         FOREIGN KEY (product_id) REFERENCES products(id)
     )
@@ -86,6 +461,20 @@ def create_database():
     )
     ''')
     
+    # Create order_items table - one row per product in an order, with the
+    # price paid at checkout
+    cursor.execute('''
+    CREATE TABLE order_items (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        order_id INTEGER NOT NULL,
+        product_id INTEGER NOT NULL,
+        quantity INTEGER NOT NULL,
+        price REAL NOT NULL,
+        FOREIGN KEY (order_id) REFERENCES orders(id),
+        FOREIGN KEY (product_id) REFERENCES products(id)
+    )
+    ''')
+    
     # Create chatbot_logs table
     cursor.execute('''
     CREATE TABLE chatbot_logs (
@@ -97,6 +486,39 @@ def create_database():
     )
     ''')
     
+    # Per-user cart/wishlist counters, maintained by triggers so the app
+    # reads counts with a primary-key lookup instead of COUNT(*)
+    cursor.execute('''
+    CREATE TABLE user_stats (
+        user_id INTEGER PRIMARY KEY,
+        cart_count INTEGER NOT NULL DEFAULT 0,
+        wishlist_count INTEGER NOT NULL DEFAULT 0
+    )
+    ''')
+    
+    # Catalog generation counter - bumped by triggers on every product change
+    # so the app's in-memory catalog cache knows when to reload
+    cursor.execute('''
+    CREATE TABLE catalog_meta (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        generation INTEGER NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+    cursor.execute('INSERT INTO catalog_meta (id, generation) VALUES (1, 0)')
+    
+    # Full-text search index over the catalog (external content table,
+    # kept in sync with products by the triggers from create_triggers()).
+    # Trigrams let a query match inside words ("book" finds "MacBook"),
+    # as the LIKE '%term%' search did
+    cursor.execute('''
+    CREATE VIRTUAL TABLE products_fts USING fts5(
+        name, category, description, specs,
+        content='products', content_rowid='id',
+        tokenize='trigram'
+    )
+    ''')
+    
     # Sample products data - FIXED: Using 'image' field
     products = [
         # Smartphones (8 products)
@@ -304,7 +726,7 @@ def create_database():
              'microphone': 'Yes',
              'bluetooth': '5.2'
          }),
-         'headphones1.png', True, 4.8),
+         'headphone1.png', True, 4.8),
         
         ('Bose QuietComfort 45', 'Headphones', 28990.00,
          'World-class noise cancellation',
@@ -316,7 +738,7 @@ def create_database():
              'microphone': 'Yes',
              'bluetooth': '5.1'
          }),
-         'headphones2.png', False, 4.7),
+         'headphone2.png', False, 4.7),
         
         ('Sennheiser Momentum 4', 'Headphones', 29990.00,
          'Premium sound with 60-hour battery',
@@ -328,7 +750,7 @@ def create_database():
              'microphone': 'Yes',
              'bluetooth': '5.2'
          }),
-         'headphones3.png', True, 4.6),
+         'headphone3.png', True, 4.6),
         
         ('Apple AirPods Max', 'Headphones', 59900.00,
          'High-fidelity audio with spatial audio',
@@ -340,7 +762,7 @@ def create_database():
              'microphone': 'Yes',
              'bluetooth': '5.0'
          }),
-         'headphones4.png', False, 4.5),
+         'headphone4.png', False, 4.5),
         
         ('JBL Tour One M2', 'Headphones', 22990.00,
          'Smart ambient aware technology',
@@ -352,7 +774,7 @@ def create_database():
              'microphone': 'Yes',
              'bluetooth': '5.3'
          }),
-         'headphones5.png', True, 4.4),
+         'headphone5.png', True, 4.4),
         
         ('Beats Studio Pro', 'Headphones', 34990.00,
          'Personalized spatial audio',
@@ -364,7 +786,7 @@ def create_database():
              'microphone': 'Yes',
              'bluetooth': '5.3'
          }),
-         'headphones6.png', False, 4.3),
+         'headphone6.png', False, 4.3),
         
         ('Audio-Technica ATH-M50xBT2', 'Headphones', 17990.00,
          'Studio monitor quality wireless',
@@ -376,7 +798,7 @@ def create_database():
              'microphone': 'Yes',
              'bluetooth': '5.0'
          }),
-         'headphones7.png', True, 4.7),
+         'headphone7.png', True, 4.7),
         
         ('Bowers & Wilkins PX7 S2', 'Headphones', 39990.00,
          'Premium materials with exceptional sound',
@@ -388,7 +810,7 @@ def create_database():
              'microphone': 'Yes',
              'bluetooth': '5.2'
          }),
-         'headphones8.png', False, 4.6),
+         'headphone8.png', False, 4.6),
         
         # Earbuds (8 products)
         ('Apple AirPods Pro 2', 'Earbuds', 24900.00,
@@ -494,15 +916,32 @@ def create_database():
     VALUES (?, ?, ?, ?, ?, ?, ?, ?)
     ''', products)
     
-    # Create a sample user (for testing)
+    # Create a sample user (for testing) - password: password123
     cursor.execute('''
     INSERT INTO users (full_name, email, phone, address, pincode, password)
     VALUES ('John Doe', 'john@example.com', '9876543210', 
-            '123 Main Street, Mumbai, Maharashtra', '400001', 'password123')
-    ''')
+            '123 Main Street, Mumbai, Maharashtra', '400001', ?)
+    ''', (hash_password(SAMPLE_PASSWORD),))
     
     conn.commit()
     
+    if scale:
+        started = time.perf_counter()
+        seed_scale(conn, **scale)
+    
+    # Indexes, triggers and derived tables last, so bulk loads skip per-row upkeep
+    step = time.perf_counter()
+    create_indexes(cursor)
+    create_triggers(cursor)
+    rebuild_derived(cursor)
+    conn.commit()
+    
+    if scale:
+        print(f"  indexes, triggers, FTS and user_stats built in {time.perf_counter() - step:.1f}s")
+        cursor.execute('PRAGMA optimize')
+        cursor.execute('PRAGMA journal_mode = DELETE')
+        print(f"Total {time.perf_counter() - started:.1f}s")
+    
     # Verify the data was inserted correctly
     cursor.execute("SELECT COUNT(*) FROM products")
     product_count = cursor.fetchone()[0]
@@ -520,9 +959,69 @@ def create_database():
     print("\nIMPORTANT: Make sure you have these image files in /static/images/products/ folder:")
     print("  phone1.png, phone2.png, ..., phone8.png")
     print("  laptop1.png, laptop2.png, ..., laptop8.png")
-    print("  headphones1.png, headphones2.png, ..., headphones8.png")
+    print("  headphone1.png, headphone2.png, ..., headphone8.png")
     print("  ear1.png, ear2.png, ..., ear8.png")
     print("  default.png (as fallback)")
 
+def check_user_stats(database='database.db', repair=False):
+    """Compare user_stats with real cart/wishlist counts, optionally rebuilding it"""
+    conn = sqlite3.connect(database)
+    cursor = conn.cursor()
+    
+    cursor.execute(f'''
+        WITH actual (user_id, cart, wishlist) AS ({USER_COUNTS_SQL}),
+             ids AS (SELECT user_id FROM actual UNION SELECT user_id FROM user_stats)
+        SELECT ids.user_id,
+               COALESCE(s.cart_count, 0), COALESCE(a.cart, 0),
+               COALESCE(s.wishlist_count, 0), COALESCE(a.wishlist, 0)
+        FROM ids
+        LEFT JOIN actual a ON a.user_id = ids.user_id
+        LEFT JOIN user_stats s ON s.user_id = ids.user_id
+        WHERE COALESCE(s.cart_count, 0) != COALESCE(a.cart, 0)
+           OR COALESCE(s.wishlist_count, 0) != COALESCE(a.wishlist, 0)
+    ''')
+    mismatches = cursor.fetchall()
+    
+    for user_id, cart_stored, cart_actual, wishlist_stored, wishlist_actual in mismatches:
+        print(f"  user {user_id}: cart {cart_stored} (actual {cart_actual}), "
+              f"wishlist {wishlist_stored} (actual {wishlist_actual})")
+    print(f"{len(mismatches)} user_stats rows out of sync")
+    
+    if repair and mismatches:
+        cursor.execute('DELETE FROM user_stats')
+        cursor.execute(f'INSERT INTO user_stats (user_id, cart_count, wishlist_count) {USER_COUNTS_SQL}')
+        conn.commit()
+        print("user_stats rebuilt")
+    
+    conn.close()
+    return mismatches
+
 if __name__ == '__main__':
-    create_database()
\ No newline at end of file
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Create or maintain the TechStore database')
+    parser.add_argument('--check-stats', action='store_true',
+                        help='verify the cart/wishlist counters instead of recreating the database')
+    parser.add_argument('--repair', action='store_true',
+                        help='with --check-stats, rebuild user_stats if it is out of sync')
+    parser.add_argument('--scale', type=int, metavar='PRODUCTS',
+                        help='also generate this many products plus users, carts, wishlists, orders and chat logs')
+    parser.add_argument('--users', type=int, help='with --scale: generated users (default PRODUCTS / 2)')
+    parser.add_argument('--cart-items', type=int, default=5, help='with --scale: cart rows per user')
+    parser.add_argument('--wishlist-items', type=int, default=5, help='with --scale: wishlist rows per user')
+    parser.add_argument('--orders', type=int, help='with --scale: generated orders (default one per user)')
+    parser.add_argument('--chat-logs', type=int, help='with --scale: chatbot log rows (default one per user)')
+    parser.add_argument('--seed', type=int, default=42, help='with --scale: random seed')
+    parser.add_argument('--database', default='database.db')
+    args = parser.parse_args()
+    
+    if args.check_stats:
+        check_user_stats(args.database, repair=args.repair)
+    elif args.scale:
+        create_database(args.database, scale={
+            'products': args.scale, 'users': args.users, 'cart_items': args.cart_items,
+            'wishlist_items': args.wishlist_items, 'orders': args.orders,
+            'chat_logs': args.chat_logs, 'seed': args.seed,
+        })
+    else:
+        create_database(args.database)
\ No newline at end of file
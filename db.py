@@ -0,0 +1,288 @@
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Applied once when a pooled connection is opened
+PRAGMAS = (
+    'PRAGMA journal_mode = WAL',
+    'PRAGMA busy_timeout = 5000',
+    'PRAGMA synchronous = NORMAL',
+    'PRAGMA cache_size = -16000',      # ~16 MB page cache per connection
+    'PRAGMA mmap_size = 134217728',    # 128 MB memory-mapped reads
+    'PRAGMA temp_store = MEMORY',
+)
+
+STATEMENT_CACHE_SIZE = 256
+
+
+class PoolExhausted(sqlite3.OperationalError):
+    """Raised when no pooled connection frees up in time"""
+
+
+class PooledConnection(sqlite3.Connection):
+    """sqlite3 connection whose close() hands it back to its pool"""
+
+    pool = None
+    checked_out = False
+    lease = 0  # bumped on every checkout
+    owner = None  # thread holding the current checkout
+
+    def close(self):
+        if self.pool is None:
+            return super().close()
+        # A repeated close() from a handler whose checkout has ended (and the
+        # connection possibly re-acquired by another thread) is a no-op
+        if self.owner == threading.get_ident():
+            self.pool.release(self, self.lease)
+
+    def disconnect(self):
+        """Really close the underlying SQLite handle"""
+        super().close()
+
+
+class ConnectionPool:
+    """Bounded per-process pool of pragma-tuned SQLite connections.
+
+    Connections are opened lazily, reused LIFO so the warmest page cache
+    is handed out first, and reset when the process forks (gunicorn
+    workers each get their own pool).
+    """
+
+    def __init__(self, database, size=8, timeout=10.0):
+        self.database = database
+        self.size = size
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(self.size)
+
+    def _check_pid(self):
+        # Connections inherited across fork() must not be used by the child
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._reset()
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.database,
+            timeout=self.timeout,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            factory=PooledConnection,
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        conn.pool = self
+        return conn
+
+    def acquire(self):
+        """Check out a connection, opening a new one if none are idle"""
+        self._check_pid()
+        if not self._slots.acquire(timeout=self.timeout):
+            raise PoolExhausted('Timed out waiting for a database connection')
+
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            try:
+                conn = self._connect()
+            except Exception:
+                self._slots.release()
+                raise
+
+        conn.checked_out = True
+        conn.lease += 1
+        conn.owner = threading.get_ident()
+        return conn
+
+    def release(self, conn, lease=None):
+        """Return a connection to the pool; safe to call more than once.
+
+        With ``lease`` the call is ignored unless the connection is still on
+        that checkout, so a late second release cannot take it away from the
+        thread that has acquired it since.
+        """
+        if not conn.checked_out or (lease is not None and lease != conn.lease):
+            return
+        conn.checked_out = False
+        conn.owner = None
+
+        # Never hand out a connection with a half-finished transaction
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.disconnect()
+            self._slots.release()
+            return
+
+        if conn.pool is self and self._pid == os.getpid():
+            self._idle.put(conn)
+            self._slots.release()
+
+    def close_all(self):
+        """Close every idle connection (used on shutdown and in benchmarks)"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.disconnect()
+
+
+_STOP = object()
+
+
+class BatchWriter:
+    """Background writer that batches INSERTs off the request path.
+
+    Rows are queued by submit() and written by a daemon thread with
+    executemany() in one transaction per batch, flushed when ``batch_size``
+    rows are waiting or ``flush_interval`` seconds after the first one.
+    The queue is bounded: with policy 'drop' a full queue discards the new
+    row right away, with 'block' the caller waits up to ``block_timeout``
+    seconds before dropping. close() flushes whatever is still queued.
+    """
+
+    def __init__(self, database, sql, max_queue=10000, batch_size=100,
+                 flush_interval=1.0, policy='drop', block_timeout=0.05):
+        if policy not in ('drop', 'block'):
+            raise ValueError("policy must be 'drop' or 'block'")
+        self.database = database
+        self.sql = sql
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.restarts = 0
+        self._queue = queue.Queue(max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._retry_at = 0.0  # a writer that died is restarted after this
+
+    def _running(self):
+        return self._thread is not None and self._pid == os.getpid() and self._thread.is_alive()
+
+    def _ensure_started(self):
+        if self._running():
+            return
+        with self._lock:
+            if self._running():
+                return
+            if self._pid not in (None, os.getpid()):
+                # Threads do not survive fork(); rows queued in the parent stay there
+                self._queue = queue.Queue(self._queue.maxsize)
+            elif self._thread is not None:
+                # The writer died; rows keep queueing until the retry delay passes
+                if time.monotonic() < self._retry_at:
+                    return
+                self.restarts += 1
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='batch-writer', daemon=True)
+            self._thread.start()
+
+    def submit(self, row):
+        """Queue one parameter tuple; returns False if it was dropped"""
+        self._ensure_started()
+        try:
+            if self.policy == 'block':
+                self._queue.put(row, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def _connect(self):
+        conn = sqlite3.connect(self.database, timeout=30)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _write(self, conn, batch):
+        try:
+            with conn:
+                conn.executemany(self.sql, batch)
+            self.written += len(batch)
+        except sqlite3.Error as e:
+            self.failed += len(batch)
+            logger.warning('Batch write of %d rows failed: %s', len(batch), e)
+
+    def _run(self):
+        try:
+            conn = self._connect()
+            try:
+                self._loop(conn)
+            finally:
+                conn.close()
+        except Exception:
+            self._retry_at = time.monotonic() + max(self.flush_interval, 1.0)
+            logger.exception('Batch writer for %s died; restarting on a later submit', self.database)
+
+    def _loop(self, conn):
+        stopping = False
+        while not stopping:
+            batch = []
+            deadline = None
+            while len(batch) < self.batch_size:
+                timeout = self.flush_interval if deadline is None else deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    row = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if row is _STOP:
+                    stopping = True
+                    break
+                batch.append(row)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if stopping:
+                # Drain everything submitted before close()
+                while True:
+                    try:
+                        row = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if row is not _STOP:
+                        batch.append(row)
+
+            if batch:
+                self._write(conn, batch)
+
+    def close(self, timeout=5.0):
+        """Flush queued rows and stop the writer thread"""
+        thread = self._thread
+        if thread is None or self._pid != os.getpid() or not thread.is_alive():
+            return
+        # Blocking put: the stop marker must not be dropped on a full queue
+        self._queue.put(_STOP)
+        thread.join(timeout)
+        self._thread = None
+
+    def stats(self):
+        return {
+            'written': self.written,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'restarts': self.restarts,
+            'queued': self._queue.qsize(),
+        }
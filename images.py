@@ -0,0 +1,216 @@
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from PIL import Image
+except ImportError:  # without Pillow the original images are served as-is
+    Image = None
+
+# Widths generated for every product image (never wider than the source)
+IMAGE_WIDTHS = (160, 320, 480)
+# Width used for the plain src attribute (browsers without srcset support)
+DEFAULT_WIDTH = 320
+WEBP_QUALITY = 80
+SOURCE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp')
+MANIFEST_NAME = 'manifest.json'
+
+
+def content_hash(path):
+    """Short SHA-256 of a file's bytes; part of every variant's file name"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def default_width(widths):
+    """Width served as the plain src: the largest not above DEFAULT_WIDTH"""
+    return max((width for width in widths if width <= DEFAULT_WIDTH), default=min(widths))
+
+
+def variant_name(name, digest, width, ext):
+    return f'{os.path.splitext(name)[0]}-{digest}-{width}.{ext}'
+
+
+def render_variants(source, cache_dir, digest, widths):
+    """Write the resized original-format and WebP copies of one image.
+
+    Runs in a worker process. Returns the widths actually written.
+    """
+    name = os.path.basename(source)
+    fmt = 'PNG' if name.lower().endswith('.png') else 'JPEG'
+    ext = 'png' if fmt == 'PNG' else 'jpg'
+    written = []
+    with Image.open(source) as image:
+        image.load()
+        if fmt == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        for width in sorted({min(width, image.width) for width in widths}):
+            height = max(1, round(image.height * width / image.width))
+            resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            for out_ext, out_fmt, options in ((ext, fmt, {'optimize': True}),
+                                              ('webp', 'WEBP', {'quality': WEBP_QUALITY, 'method': 6})):
+                path = os.path.join(cache_dir, variant_name(name, digest, width, out_ext))
+                # Write then rename so a crashed build never leaves a truncated variant
+                resized.save(path + '.tmp', out_fmt, **options)
+                os.replace(path + '.tmp', path)
+            written.append(width)
+    return written
+
+
+class ImagePipeline:
+    """Resized and WebP variants of the product images, cached on disk.
+
+    Variant files are named after a hash of the source bytes, so they can be
+    served with long cache lifetimes and never go stale. A manifest records
+    each source's size, mtime and hash; build() only re-renders images whose
+    content changed (in a process pool) and deletes variants nobody uses.
+    """
+
+    def __init__(self, source_dir, cache_dir, url_prefix, widths=IMAGE_WIDTHS, workers=None):
+        self.source_dir = source_dir
+        self.cache_dir = cache_dir
+        self.url_prefix = url_prefix.rstrip('/') + '/'
+        self.widths = tuple(widths)
+        self.workers = workers
+        self.entries = {}  # source file name -> manifest entry
+
+    @property
+    def available(self):
+        return Image is not None
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.cache_dir, MANIFEST_NAME)
+
+    def load(self):
+        """Read the manifest written by the last build (missing = no variants)"""
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+        if manifest.get('widths') == list(self.widths):
+            self.entries = manifest.get('images', {})
+        else:
+            self.entries = {}
+        return self
+
+    def _is_complete(self, name, entry):
+        return all(
+            os.path.exists(os.path.join(self.cache_dir, variant_name(name, entry['hash'], width, ext)))
+            for width in entry['widths'] for ext in ('webp', self._fallback_ext(name))
+        )
+
+    @staticmethod
+    def _fallback_ext(name):
+        return 'png' if name.lower().endswith('.png') else 'jpg'
+
+    def build(self):
+        """Bring the cache up to date with the source directory; returns counts"""
+        if not self.available:
+            return {'images': 0, 'rendered': 0, 'failed': 0, 'removed': 0}
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        entries = {}
+        jobs = {}
+        for name in sorted(os.listdir(self.source_dir)):
+            if not name.lower().endswith(SOURCE_EXTENSIONS):
+                continue
+            path = os.path.join(self.source_dir, name)
+            stat = os.stat(path)
+            old = self.entries.get(name)
+            if old and (old['mtime'], old['size']) == (stat.st_mtime_ns, stat.st_size) \
+                    and self._is_complete(name, old):
+                entries[name] = old
+                continue
+
+            digest = content_hash(path)
+            entry = {'hash': digest, 'mtime': stat.st_mtime_ns, 'size': stat.st_size}
+            if old and old['hash'] == digest and self._is_complete(name, old):
+                entries[name] = dict(entry, widths=old['widths'])  # touched, not changed
+            else:
+                jobs[name] = (path, entry)
+
+        failed = 0
+        if jobs:
+            with ProcessPoolExecutor(self.workers) as pool:
+                futures = {
+                    name: pool.submit(render_variants, path, self.cache_dir, entry['hash'], self.widths)
+                    for name, (path, entry) in jobs.items()
+                }
+                for name, future in futures.items():
+                    try:
+                        entries[name] = dict(jobs[name][1], widths=future.result())
+                    except Exception as e:
+                        failed += 1
+                        print(f"Image variants for {name} failed: {str(e)}")
+
+        # Drop variants of replaced or deleted sources
+        keep = {MANIFEST_NAME}
+        for name, entry in entries.items():
+            for width in entry['widths']:
+                keep.add(variant_name(name, entry['hash'], width, 'webp'))
+                keep.add(variant_name(name, entry['hash'], width, self._fallback_ext(name)))
+        removed = 0
+        for filename in os.listdir(self.cache_dir):
+            if filename not in keep:
+                os.remove(os.path.join(self.cache_dir, filename))
+                removed += 1
+
+        with open(self.manifest_path + '.tmp', 'w') as f:
+            json.dump({'widths': list(self.widths), 'images': entries}, f, indent=1, sort_keys=True)
+        os.replace(self.manifest_path + '.tmp', self.manifest_path)
+        self.entries = entries
+        return {'images': len(entries), 'rendered': len(jobs) - failed, 'failed': failed, 'removed': removed}
+
+    def variants(self, name):
+        """Extra product fields (image_src, image_srcset, image_webp_srcset) for one image"""
+        entry = self.entries.get(name) if name else None
+        if not entry:
+            return {}
+
+        def url(width, ext):
+            return self.url_prefix + variant_name(name, entry['hash'], width, ext)
+
+        widths = entry['widths']
+        fallback = self._fallback_ext(name)
+        return {
+            'image_src': url(default_width(widths), fallback),
+            'image_srcset': ', '.join(f'{url(width, fallback)} {width}w' for width in widths),
+            'image_webp_srcset': ', '.join(f"{url(width, 'webp')} {width}w" for width in widths),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build resized and WebP variants of the product images')
+    parser.add_argument('--source', default=os.path.join('static', 'images', 'products'))
+    parser.add_argument('--cache', default=os.path.join('static', 'images', 'cache'))
+    parser.add_argument('--workers', type=int, default=None)
+    args = parser.parse_args()
+
+    if Image is None:
+        raise SystemExit('Pillow is not installed (pip install -r requirements.txt)')
+
+    pipeline = ImagePipeline(args.source, args.cache, '/static/images/cache/', workers=args.workers).load()
+    counts = pipeline.build()
+    print(f"{counts['images']} images: {counts['rendered']} rendered, "
+          f"{counts['failed']} failed, {counts['removed']} stale files removed")
+
+    original = sum(entry['size'] for entry in pipeline.entries.values())
+    webp = sum(
+        os.path.getsize(os.path.join(args.cache, variant_name(
+            name, entry['hash'], default_width(entry['widths']), 'webp')))
+        for name, entry in pipeline.entries.items()
+    )
+    if original:
+        print(f'originals {original / 1024:.0f} KB, {DEFAULT_WIDTH}w WebP set {webp / 1024:.0f} KB '
+              f'({webp / original:.0%})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+# scrypt cost parameters; raising them only affects newly stored hashes,
+# older ones are upgraded on the user's next successful login
+SCRYPT_N = int(os.environ.get('SCRYPT_N', 2 ** 14))
+SCRYPT_R = int(os.environ.get('SCRYPT_R', 8))
+SCRYPT_P = int(os.environ.get('SCRYPT_P', 1))
+SALT_BYTES = 16
+
+
+def _scrypt(password, salt, n, r, p):
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * n * r * p, dklen=32)
+
+
+def hash_password(password, n=None, r=None, p=None):
+    """Slow, salted scrypt hash stored as scrypt$n$r$p$salt$digest"""
+    n, r, p = n or SCRYPT_N, r or SCRYPT_R, p or SCRYPT_P
+    salt = os.urandom(SALT_BYTES)
+    digest = _scrypt(password, salt, n, r, p)
+    return f'scrypt${n}${r}${p}${salt.hex()}${digest.hex()}'
+
+
+def verify_password(stored, password):
+    """Check a password against a scrypt hash or a legacy bare SHA-256 hex digest"""
+    if stored.startswith('scrypt$'):
+        try:
+            _, n, r, p, salt, digest = stored.split('$')
+            expected = _scrypt(password, bytes.fromhex(salt), int(n), int(r), int(p))
+        except ValueError:
+            return False
+        return hmac.compare_digest(expected.hex(), digest)
+
+    legacy = hashlib.sha256(password.encode()).hexdigest()
+    return hmac.compare_digest(legacy, stored)
+
+
+def needs_rehash(stored):
+    """True for legacy hashes and hashes made with older cost parameters"""
+    return not stored.startswith(f'scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}$')
+
+
+class AuthBusy(Exception):
+    """Too many password checks are already queued"""
+
+
+class PasswordHasher:
+    """Runs password hashing on a small dedicated thread pool.
+
+    hashlib.scrypt releases the GIL, so at most ``workers`` hashes burn CPU
+    at once and request threads serving the catalog keep running. At most
+    ``max_pending`` calls may be queued or running; beyond that callers get
+    AuthBusy immediately instead of piling up behind a login burst; a call
+    still waiting after ``timeout`` seconds gets AuthBusy too.
+    """
+
+    def __init__(self, workers=2, max_pending=16, timeout=10.0):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.rejected = 0
+        self._lock = threading.Lock()
+        self._pid = None
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def _get_executor(self):
+        # Worker threads do not survive fork(); start a pool per process
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._pid = os.getpid()
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='password')
+                self._slots = threading.BoundedSemaphore(self.max_pending)
+            return self._executor
+
+    def _run(self, fn, *args):
+        executor = self._get_executor()
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            self.rejected += 1
+            raise AuthBusy('Too many login attempts in progress, please retry shortly')
+        try:
+            future = executor.submit(fn, *args)
+        except BaseException:
+            slots.release()
+            raise
+        # The slot is freed when the job finishes, not when we stop waiting,
+        # so timed-out hashes still count against max_pending
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            self.rejected += 1
+            raise AuthBusy('Login is taking too long, please retry shortly')
+
+    def hash(self, password):
+        return self._run(hash_password, password)
+
+    def verify(self, stored, password):
+        return self._run(verify_password, stored, password)
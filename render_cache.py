@@ -0,0 +1,43 @@
+import threading
+from collections import OrderedDict
+
+
+class RenderCache:
+    """Bounded LRU of rendered template output.
+
+    Keys must contain everything the output depends on (for product pages:
+    product id, catalog version and the wishlist bit), so entries never
+    need invalidating; superseded versions simply age out.
+    """
+
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get_or_render(self, key, render):
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return html
+            self.misses += 1
+
+        # Render outside the lock; two threads may race to fill the same key
+        html = render()
+        with self._lock:
+            self._entries[key] = html
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return html
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
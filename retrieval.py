@@ -0,0 +1,215 @@
+import re
+import threading
+from collections import Counter
+
+try:
+    import numpy as np
+except ImportError:  # catalog-aware chatbot answers are optional
+    np = None
+
+# Extra words indexed with every product of a category, so "phone" or
+# "notebook" find products whose text only says "Smartphones"/"Laptops"
+CATEGORY_TERMS = {
+    'Smartphones': 'smartphone phone mobile',
+    'Laptops': 'laptop notebook computer',
+    'Headphones': 'headphone headset',
+    'Earbuds': 'earbud earphone airpod',
+}
+
+STOPWORDS = {
+    'a', 'an', 'and', 'any', 'are', 'best', 'can', 'do', 'for', 'good', 'have', 'i', 'in',
+    'is', 'it', 'me', 'my', 'need', 'of', 'on', 'or', 'please', 'recommend', 'rs', 'show',
+    'some', 'suggest', 'the', 'to', 'want', 'what', 'which', 'with', 'you',
+}
+BUDGET_WORDS = {'budget', 'cheap', 'cheapest', 'affordable', 'economical'}
+
+PRICE_PATTERN = re.compile(
+    r'\b(under|below|less than|upto|up to|within|max|above|over|more than|at least|min)\s*'
+    r'(?:rs\.?|inr|₹)?\s*(\d[\d,]*(?:\.\d+)?)\s*(k|lakhs?|lacs?)?\b')
+MAX_PRICE_WORDS = ('under', 'below', 'less than', 'upto', 'up to', 'within', 'max')
+PRICE_UNITS = {None: 1, 'k': 1000, 'lakh': 100000, 'lakhs': 100000, 'lac': 100000, 'lacs': 100000}
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Drop matches scoring below this fraction of the best one
+MIN_RELATIVE_SCORE = 0.5
+
+
+def tokenize(text):
+    """Lower-case words and numbers ('5000mAh' -> '5000', 'mah'), light plural stripping"""
+    tokens = []
+    for token in re.findall(r'[a-z]+|\d+', text.lower()):
+        if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def product_terms(product):
+    """Bag of words for one product: name, category, description and specs"""
+    parts = [product['name'], product['name'], product['category'],
+             CATEGORY_TERMS.get(product['category'], ''), product['description']]
+    for key, value in (product.get('specs') or {}).items():
+        if value == 'Yes':
+            parts.append(key.replace('_', ' '))
+        elif value != 'No':
+            parts.append(str(value))
+    return Counter(tokenize(' '.join(parts)))
+
+
+def parse_price_limits(message):
+    """(min_price, max_price, message without the price phrases)"""
+    min_price = max_price = None
+    for match in PRICE_PATTERN.finditer(message):
+        amount = float(match.group(2).replace(',', '')) * PRICE_UNITS[match.group(3)]
+        if match.group(1) in MAX_PRICE_WORDS:
+            max_price = amount
+        else:
+            min_price = amount
+    return min_price, max_price, PRICE_PATTERN.sub(' ', message)
+
+
+def format_price(amount):
+    """Indian digit grouping, e.g. 129999 -> ₹1,29,999"""
+    digits = str(int(round(amount)))
+    head, tail = digits[:-3], digits[-3:]
+    groups = []
+    while len(head) > 2:
+        groups.insert(0, head[-2:])
+        head = head[:-2]
+    if head:
+        groups.insert(0, head)
+    return '₹' + ','.join(groups + [tail])
+
+
+class ProductIndex:
+    """BM25 inverted index over one catalog snapshot, held as NumPy arrays.
+
+    Postings are stored term-major (CSR): ``indptr[t]:indptr[t + 1]`` slices
+    ``docs``/``weights`` for term t, with the BM25 weight precomputed, so a
+    query is scored with one np.bincount over the concatenated postings.
+    """
+
+    def __init__(self, products, doc_terms):
+        self.products = products
+        self.vocab = {}
+        term_ids, doc_ids, tfs = [], [], []
+        lengths = np.zeros(len(products), dtype=np.float32)
+        for doc, terms in enumerate(doc_terms):
+            lengths[doc] = sum(terms.values())
+            for term, tf in terms.items():
+                term_ids.append(self.vocab.setdefault(term, len(self.vocab)))
+                doc_ids.append(doc)
+                tfs.append(tf)
+
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        order = np.argsort(term_ids, kind='stable')
+        term_ids = term_ids[order]
+        self.docs = np.asarray(doc_ids, dtype=np.int32)[order]
+        tf = np.asarray(tfs, dtype=np.float32)[order]
+
+        df = np.bincount(term_ids, minlength=len(self.vocab)).astype(np.float32)
+        self.indptr = np.concatenate(([0], np.cumsum(df))).astype(np.int64)
+        idf = np.log1p((len(products) - df + 0.5) / (df + 0.5))
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[self.docs] / max(lengths.mean(), 1.0))
+        self.weights = (idf[term_ids] * tf * (BM25_K1 + 1) / (tf + norm)).astype(np.float32)
+
+        self.prices = np.array([p['price'] for p in products], dtype=np.float64)
+        self.ratings = np.array([p['rating'] or 0 for p in products], dtype=np.float32)
+        self.in_stock = np.array([p['stock'] > 0 for p in products], dtype=bool)
+        categories = sorted({p['category'] for p in products})
+        self.category_codes = {category: code for code, category in enumerate(categories)}
+        self.categories = np.array([self.category_codes[p['category']] for p in products], dtype=np.int32)
+        # Category named by a query word ('phone' -> Smartphones)
+        self.category_words = {}
+        for category, words in CATEGORY_TERMS.items():
+            for word in tokenize(f'{category} {words}'):
+                self.category_words[word] = category
+
+    def search(self, message, limit=3):
+        """Best matching in-stock products for a free-text message"""
+        min_price, max_price, text = parse_price_limits(message.lower())
+        tokens = [token for token in tokenize(text) if token not in STOPWORDS]
+
+        mask = self.in_stock.copy()
+        if min_price is not None:
+            mask &= self.prices >= min_price
+        if max_price is not None:
+            mask &= self.prices <= max_price
+        category = next((self.category_words[t] for t in tokens if t in self.category_words), None)
+        if category in self.category_codes:
+            mask &= self.categories == self.category_codes[category]
+
+        terms = [self.vocab[t] for t in tokens
+                 if t in self.vocab and t not in self.category_words and t not in BUDGET_WORDS]
+        if terms:
+            docs = np.concatenate([self.docs[self.indptr[t]:self.indptr[t + 1]] for t in terms])
+            weights = np.concatenate([self.weights[self.indptr[t]:self.indptr[t + 1]] for t in terms])
+            scores = np.bincount(docs, weights=weights, minlength=len(self.products))
+            mask &= scores > 0
+            if mask.any():
+                mask &= scores >= scores[mask].max() * MIN_RELATIVE_SCORE
+        elif category is None and min_price is None and max_price is None:
+            return []  # nothing in the message refers to the catalog
+        else:
+            scores = np.zeros(len(self.products))
+
+        candidates = np.flatnonzero(mask)
+        if BUDGET_WORDS.intersection(tokens):
+            # Cheapest first, relevance breaks ties
+            order = np.lexsort((-scores[candidates], self.prices[candidates]))
+        else:
+            order = np.lexsort((-self.ratings[candidates], -scores[candidates]))
+        return [self.products[i] for i in candidates[order[:limit]]]
+
+
+class ProductRetriever:
+    """Keeps a ProductIndex in step with the catalog cache.
+
+    When the catalog generation changes the index is rebuilt, re-tokenizing
+    only products whose serialized JSON changed since the last build.
+    """
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        self._lock = threading.Lock()
+        self._version = None
+        self._index = None
+        self._terms = {}  # product id -> (json fragment, Counter)
+
+    @property
+    def available(self):
+        return np is not None
+
+    def index(self):
+        snapshot = self.catalog.snapshot()
+        if self._version == snapshot.version and self._index is not None:
+            return self._index
+
+        with self._lock:
+            if self._version != snapshot.version or self._index is None:
+                terms = {}
+                for product in snapshot.products:
+                    fragment = snapshot.fragments[product['id']]
+                    cached = self._terms.get(product['id'])
+                    if cached is None or cached[0] != fragment:
+                        cached = (fragment, product_terms(product))
+                    terms[product['id']] = cached
+                self._terms = terms
+                self._index = ProductIndex(snapshot.products,
+                                           [terms[p['id']][1] for p in snapshot.products])
+                self._version = snapshot.version
+        return self._index
+
+    def search(self, message, limit=3):
+        if not self.available:
+            return []
+        return self.index().search(message, limit)
+
+    def answer(self, message, limit=3):
+        """Chat reply listing matching products, or None if nothing matched"""
+        products = self.search(message, limit)
+        if not products:
+            return None
+        listed = ', '.join(f"{p['name']} ({format_price(p['price'])})" for p in products)
+        return f"Here's what I found: {listed}. Would you like more details on any of these?"
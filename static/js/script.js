@@ -7,6 +7,12 @@ let currentCartItems = [];
 // API Base URL
 const API_BASE = window.location.origin;
 
+// Orders fetched per page in the orders modal
+const ORDERS_PAGE_SIZE = 10;
+
+// Products fetched per page in the category section
+const CATEGORY_PAGE_SIZE = 24;
+
 // DOM Elements
 const elements = {
     // Navigation
@@ -66,24 +72,38 @@ document.addEventListener('DOMContentLoaded', () => {
     console.log("DOM loaded, initializing app...");
     initializeApp();
     setupEventListeners();
-    loadInitialData();
 });
 
-function initializeApp() {
+async function initializeApp() {
     console.log("Initializing app...");
     
-    // Check authentication status
-    checkAuthStatus();
-    
-    // Load cart and wishlist counts
-    updateCartWishlistCounts();
-    
-    // Load deals products
-    loadDealsProducts();
-    
     // Set default active category
     setActiveCategory('Smartphones');
-    loadCategoryProducts('Smartphones');
+    
+    // Auth state, counts, deals and the first page of the default category in one round trip
+    try {
+        const response = await fetch(`${API_BASE}/api/bootstrap?category=Smartphones`, {
+            credentials: 'include'
+        });
+        
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        
+        const data = await response.json();
+        applyAuthState(data.auth);
+        updateCartWishlistCounts();
+        renderDealsProducts(data.deals);
+        renderCategoryProducts(data.category, data);
+    } catch (error) {
+        console.error('Bootstrap failed, loading sections separately:', error);
+        
+        // Check authentication status first: listings carry per-user wishlist flags
+        await checkAuthStatus();
+        updateCartWishlistCounts();
+        loadDealsProducts();
+        loadCategoryProducts('Smartphones');
+    }
 }
 
 function setupEventListeners() {
@@ -448,22 +468,26 @@ async function checkAuthStatus() {
         
         const data = await response.json();
         console.log("Auth check response:", data);
-        
-        if (data.logged_in) {
-            currentUser = data.user;
-            updateUserUI(true, data.user);
-            cartCount = data.cart_count || 0;
-            wishlistCount = data.wishlist_count || 0;
-            updateCartWishlistUI();
-        } else {
-            updateUserUI(false);
-        }
+        applyAuthState(data);
     } catch (error) {
         console.error('Auth check failed:', error);
         updateUserUI(false);
     }
 }
 
+function applyAuthState(data) {
+    // data is an /api/auth/check body (also the "auth" part of /api/bootstrap)
+    if (data.logged_in) {
+        currentUser = data.user;
+        updateUserUI(true, data.user);
+        cartCount = data.cart_count || 0;
+        wishlistCount = data.wishlist_count || 0;
+        updateCartWishlistUI();
+    } else {
+        updateUserUI(false);
+    }
+}
+
 async function handleLogin() {
     const identifier = document.getElementById('login-identifier').value;
     const password = document.getElementById('login-password').value;
@@ -673,17 +697,45 @@ async function addToCart(productId) {
     }
 }
 
-async function removeFromCart(productId) {
-    if (!currentUser) {
-        showNotification('Please login to manage cart', 'error');
-        return;
-    }
-    
-    showLoading(true);
-    
+// Quantity edits and removals made within this window are coalesced into
+// a single /api/cart/batch call (one server transaction)
+const CART_BATCH_DELAY = 300;
+const pendingCartOps = new Map();
+let cartBatchTimer = null;
+// Batches sent so far, chained so they reach the server in order; resolves
+// false if any of them failed since the last flush reported
+let cartBatchChain = Promise.resolve(true);
+
+function queueCartOperation(productId, operation) {
+    // A later edit to the same product replaces the earlier one
+    pendingCartOps.set(productId, { ...operation, product_id: productId });
+    clearTimeout(cartBatchTimer);
+    cartBatchTimer = setTimeout(flushCartOperations, CART_BATCH_DELAY);
+}
+
+// Send queued edits now; resolves true once every edit made so far is on
+// the server, false if a batch failed (the cart is then reloaded from it)
+async function flushCartOperations() {
+    clearTimeout(cartBatchTimer);
+    if (pendingCartOps.size > 0) {
+        const operations = Array.from(pendingCartOps.values());
+        pendingCartOps.clear();
+        cartBatchChain = cartBatchChain.then(ok => sendCartBatch(operations).then(sent => ok && sent));
+    }
+    
+    const pending = cartBatchChain;
+    const ok = await pending;
+    // Each failure is reported once; later flushes start clean
+    if (cartBatchChain === pending) cartBatchChain = Promise.resolve(true);
+    return ok;
+}
+
+async function sendCartBatch(operations) {
     try {
-        const response = await fetch(`${API_BASE}/api/cart/remove/${productId}`, {
+        const response = await fetch(`${API_BASE}/api/cart/batch`, {
             method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ operations }),
             credentials: 'include'
         });
         
@@ -693,22 +745,53 @@ async function removeFromCart(productId) {
             cartCount = data.cart_count;
             currentCartItems = data.cart_items;
             updateCartWishlistUI();
-            showNotification('Removed from cart', 'info');
             
             // Update cart display
             updateCartDisplay(currentCartItems, data.cart_total);
-        } else {
-            showNotification(data.error || 'Failed to remove from cart', 'error');
+            return true;
         }
+        showNotification(data.error || 'Failed to update cart', 'error');
     } catch (error) {
-        console.error('Remove from cart error:', error);
-        showNotification('Failed to remove from cart', 'error');
-    } finally {
-        showLoading(false);
+        console.error('Cart batch error:', error);
+        showNotification('Failed to update cart', 'error');
+    }
+    loadCartItems();
+    return false;
+}
+
+// Edits still waiting for the batch timer would be lost with the page;
+// keepalive lets this last batch outlive it
+window.addEventListener('pagehide', () => {
+    if (pendingCartOps.size === 0) return;
+    clearTimeout(cartBatchTimer);
+    const operations = Array.from(pendingCartOps.values());
+    pendingCartOps.clear();
+    fetch(`${API_BASE}/api/cart/batch`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ operations }),
+        credentials: 'include',
+        keepalive: true
+    });
+});
+
+function removeFromCart(productId) {
+    if (!currentUser) {
+        showNotification('Please login to manage cart', 'error');
+        return;
     }
+    
+    // Update the UI right away; the server catches up with the next batch
+    currentCartItems = currentCartItems.filter(item => item.id !== productId);
+    cartCount = currentCartItems.length;
+    updateCartWishlistUI();
+    updateCartDisplay(currentCartItems);
+    showNotification('Removed from cart', 'info');
+    
+    queueCartOperation(productId, { op: 'remove' });
 }
 
-async function updateCartQuantity(productId, newQuantity) {
+function updateCartQuantity(productId, newQuantity) {
     if (!currentUser) return;
     
     if (newQuantity < 1) {
@@ -716,33 +799,13 @@ async function updateCartQuantity(productId, newQuantity) {
         return;
     }
     
-    showLoading(true);
-    
-    try {
-        const response = await fetch(`${API_BASE}/api/cart/update/${productId}`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ quantity: newQuantity }),
-            credentials: 'include'
-        });
-        
-        const data = await response.json();
-        
-        if (response.ok) {
-            cartCount = data.cart_count;
-            currentCartItems = data.cart_items;
-            updateCartWishlistUI();
-            
-            // Update cart display
-            updateCartDisplay(currentCartItems, data.cart_total);
-            showNotification('Cart updated', 'success');
-        }
-    } catch (error) {
-        console.error('Update cart quantity error:', error);
-        showNotification('Failed to update quantity', 'error');
-    } finally {
-        showLoading(false);
+    const item = currentCartItems.find(item => item.id === productId);
+    if (item) {
+        item.quantity = newQuantity;
+        updateCartDisplay(currentCartItems);
     }
+    
+    queueCartOperation(productId, { op: 'set', quantity: newQuantity });
 }
 
 async function loadCartItems() {
@@ -973,7 +1036,7 @@ async function loadWishlistItems() {
         let html = '';
         
         for (const item of wishlistItems) {
-            html += await createProductCard(item, true);
+            html += createProductCard(item, true);
         }
         
         wishlistContainer.innerHTML = html;
@@ -992,35 +1055,40 @@ async function loadWishlistItems() {
 }
 
 // Product Functions - CORRECTED IMAGE PATH
-async function createProductCard(product, includeWishlistButton = true) {
-    // Check if product is in wishlist (for logged-in users)
-    let isInWishlist = false;
-    if (currentUser) {
-        try {
-            const wishlistResponse = await fetch(`${API_BASE}/api/wishlist`, {
-                credentials: 'include'
-            });
-            if (wishlistResponse.ok) {
-                const wishlistItems = await wishlistResponse.json();
-                isInWishlist = wishlistItems.some(item => item.id === product.id);
-            }
-        } catch (error) {
-            console.error('Error checking wishlist status:', error);
-        }
+// Logged-in listings ask the server to flag wishlisted products, so cards
+// never need a wishlist request of their own
+function wishlistParam() {
+    return currentUser ? '?wishlist=1' : '';
+}
+
+// <picture> with the server-built WebP/resized variants when the product
+// has them (see images.py), otherwise a plain <img> of the original file
+function productImageHtml(product, sizes, attributes = '') {
+    const original = `/static/images/products/${product.image || 'default.png'}`;
+    if (!product.image_webp_srcset) {
+        return `<img src="${original}" alt="${product.name}" ${attributes}>`;
     }
+    return `
+        <picture>
+            <source type="image/webp" srcset="${product.image_webp_srcset}" sizes="${sizes}">
+            <img src="${product.image_src}" srcset="${product.image_srcset}" sizes="${sizes}"
+                 alt="${product.name}" loading="lazy" decoding="async" ${attributes}>
+        </picture>
+    `;
+}
+
+function createProductCard(product, includeWishlistButton = true) {
+    // in_wishlist comes with the listing (requested with wishlistParam())
+    const isInWishlist = Boolean(product.in_wishlist);
     
     const originalPrice = product.on_sale ? product.price * 1.2 : null;
     
-    // CORRECTED: Use product.image instead of product.image_filename
-    const imageFilename = product.image || 'default.png';
-    
     return `
         <div class="product-card" data-product-id="${product.id}">
             ${product.on_sale ? '<span class="discount-badge">20% OFF</span>' : ''}
             <div class="product-image">
-                <img src="/static/images/products/${imageFilename}" 
-                     alt="${product.name}" 
-                     onclick="showProductModal(${product.id})">
+                ${productImageHtml(product, '(max-width: 600px) 90vw, 280px',
+                                   `onclick="showProductModal(${product.id})"`)}
             </div>
             <div class="product-info">
                 <span class="product-category">${product.category}</span>
@@ -1063,9 +1131,6 @@ async function showProductModal(productId) {
         const modalContent = document.getElementById('product-modal-content');
         const specs = product.specs || {};
         
-        // CORRECTED: Use product.image instead of product.image_filename
-        const productImage = product.image || 'default.png';
-        
         let specsHtml = '';
         for (const [key, value] of Object.entries(specs)) {
             specsHtml += `
@@ -1079,9 +1144,8 @@ async function showProductModal(productId) {
         modalContent.innerHTML = `
             <div class="product-modal">
                 <div class="product-modal-left">
-                    <img src="/static/images/products/${productImage}" 
-                         alt="${product.name}" 
-                         class="product-modal-image">
+                    ${productImageHtml(product, '(max-width: 768px) 90vw, 480px',
+                                       'class="product-modal-image"')}
                 </div>
                 <div class="product-modal-right">
                     <h1>${product.name}</h1>
@@ -1119,31 +1183,8 @@ async function showProductModal(productId) {
 async function loadDealsProducts() {
     try {
         console.log("Loading deals products...");
-        const response = await fetch(`${API_BASE}/api/deals`);
-        const products = await response.json();
-        
-        if (elements.dealsProducts && products.length > 0) {
-            let html = '';
-            
-            for (const product of products) {
-                html += await createProductCard(product);
-            }
-            
-            elements.dealsProducts.innerHTML = html;
-            
-            // Add event listeners to product cards
-            setTimeout(() => {
-                setupProductCardListeners();
-            }, 100);
-        } else {
-            elements.dealsProducts.innerHTML = `
-                <div class="no-products">
-                    <i class="fas fa-box-open fa-3x"></i>
-                    <h3>No deals available at the moment</h3>
-                    <p>Check back soon for exciting offers!</p>
-                </div>
-            `;
-        }
+        const response = await fetch(`${API_BASE}/api/deals${wishlistParam()}`);
+        renderDealsProducts(await response.json());
     } catch (error) {
         console.error('Load deals products error:', error);
         elements.dealsProducts.innerHTML = `
@@ -1156,49 +1197,101 @@ async function loadDealsProducts() {
     }
 }
 
-async function loadCategoryProducts(category) {
+function renderDealsProducts(products) {
+    if (elements.dealsProducts && products.length > 0) {
+        let html = '';
+        
+        for (const product of products) {
+            html += createProductCard(product);
+        }
+        
+        elements.dealsProducts.innerHTML = html;
+        
+        // Add event listeners to product cards
+        setTimeout(() => {
+            setupProductCardListeners();
+        }, 100);
+    } else {
+        elements.dealsProducts.innerHTML = `
+            <div class="no-products">
+                <i class="fas fa-box-open fa-3x"></i>
+                <h3>No deals available at the moment</h3>
+                <p>Check back soon for exciting offers!</p>
+            </div>
+        `;
+    }
+}
+
+async function loadCategoryProducts(category, after = null) {
     try {
         console.log(`Loading ${category} products...`);
-        const response = await fetch(`${API_BASE}/api/products/category/${category}`);
-        const products = await response.json();
+        const params = new URLSearchParams({ limit: CATEGORY_PAGE_SIZE });
+        if (after) params.set('after', after);
+        if (currentUser) params.set('wishlist', '1');
         
-        if (elements.categoryProducts && products.length > 0) {
-            let html = '';
-            
-            for (const product of products) {
-                html += await createProductCard(product);
-            }
-            
+        const response = await fetch(`${API_BASE}/api/products/category/${category}?${params}`);
+        renderCategoryProducts(category, await response.json(), after !== null);
+    } catch (error) {
+        console.error(`Load ${category} products error:`, error);
+        elements.categoryProducts.innerHTML = `
+            <div class="no-products">
+                <i class="fas fa-exclamation-triangle fa-3x"></i>
+                <h3>Failed to load ${category}</h3>
+                <p>Please try again later</p>
+            </div>
+        `;
+    }
+}
+
+// page is a keyset page ({products, next_cursor}); append adds it below the
+// cards already shown instead of replacing them
+function renderCategoryProducts(category, page, append = false) {
+    const products = page.products || [];
+    const loadMore = document.getElementById('category-load-more');
+    if (loadMore) loadMore.remove();
+    
+    if (elements.categoryProducts && (products.length > 0 || append)) {
+        let html = '';
+        
+        for (const product of products) {
+            html += createProductCard(product);
+        }
+        
+        if (append) {
+            // Bind only the new cards so earlier ones do not get duplicate listeners
+            const template = document.createElement('template');
+            template.innerHTML = html;
+            setupProductCardListeners(template.content);
+            elements.categoryProducts.appendChild(template.content);
+        } else {
             elements.categoryProducts.innerHTML = html;
             
             // Add event listeners to product cards
             setTimeout(() => {
                 setupProductCardListeners();
             }, 100);
-        } else {
-            elements.categoryProducts.innerHTML = `
-                <div class="no-products">
-                    <i class="fas fa-box-open fa-3x"></i>
-                    <h3>No products found in ${category}</h3>
-                    <p>Check back soon for new arrivals!</p>
-                </div>
-            `;
         }
-    } catch (error) {
-        console.error(`Load ${category} products error:`, error);
+        
+        if (page.next_cursor) {
+            elements.categoryProducts.insertAdjacentHTML('afterend',
+                '<button class="btn btn-outline btn-block" id="category-load-more">Load more products</button>');
+            document.getElementById('category-load-more')
+                .addEventListener('click', () => loadCategoryProducts(category, page.next_cursor));
+        }
+    } else {
         elements.categoryProducts.innerHTML = `
             <div class="no-products">
-                <i class="fas fa-exclamation-triangle fa-3x"></i>
-                <h3>Failed to load ${category}</h3>
-                <p>Please try again later</p>
+                <i class="fas fa-box-open fa-3x"></i>
+                <h3>No products found in ${category}</h3>
+                <p>Check back soon for new arrivals!</p>
             </div>
         `;
     }
 }
 
-function setupProductCardListeners() {
+function setupProductCardListeners(root = document) {
     // Add click listeners to product images for modal
-    document.querySelectorAll('.product-image img').forEach(img => {
+    root.querySelectorAll('.product-image img').forEach(img => {
         const productCard = img.closest('.product-card');
         if (productCard) {
             const productId = productCard.dataset.productId;
@@ -1207,7 +1300,7 @@ function setupProductCardListeners() {
     });
     
     // Add click listeners to product titles for modal
-    document.querySelectorAll('.product-title').forEach(title => {
+    root.querySelectorAll('.product-title').forEach(title => {
         const productCard = title.closest('.product-card');
         if (productCard) {
             const productId = productCard.dataset.productId;
@@ -1268,16 +1361,14 @@ async function handleSearch() {
         
         let html = '';
         products.forEach(product => {
-            // CORRECTED: Use product.image instead of product.image_filename
-            const productImage = product.image || 'default.png';
-            
             html += `
                 <a href="#" class="search-result" onclick="showProductModal(${product.id}); event.preventDefault();">
-                    <img src="/static/images/products/${productImage}" alt="${product.name}">
+                    ${productImageHtml(product, '60px')}
                     <div>
                         <h4>${product.name}</h4>
                         <div class="price">₹${product.price.toLocaleString()}</div>
                         <span class="category">${product.category}</span>
+                        ${product.snippet ? `<p class="snippet">${product.snippet}</p>` : ''}
                     </div>
                 </a>
             `;
@@ -1405,16 +1496,21 @@ async function updateProfile() {
 }
 
 // Order Functions
-async function loadOrders() {
+// Orders arrive a page at a time, each with its line items embedded
+async function loadOrders(after = null) {
     try {
-        const response = await fetch(`${API_BASE}/api/orders`, {
+        const params = new URLSearchParams({ limit: ORDERS_PAGE_SIZE });
+        if (after) params.set('after', after);
+        
+        const response = await fetch(`${API_BASE}/api/orders?${params}`, {
             credentials: 'include'
         });
-        const orders = await response.json();
+        const data = await response.json();
+        const orders = data.orders || [];
         
         const ordersContainer = document.getElementById('orders-container');
         
-        if (!orders || orders.length === 0) {
+        if (!after && orders.length === 0) {
             ordersContainer.innerHTML = `
                 <div class="no-orders">
                     <i class="fas fa-box-open fa-3x"></i>
@@ -1427,10 +1523,9 @@ async function loadOrders() {
         
         let html = '';
         orders.forEach(order => {
-            const products = JSON.parse(order.products || '[]');
             let productsHtml = '';
             
-            products.forEach(product => {
+            order.items.forEach(product => {
                 productsHtml += `
                     <div class="order-product">
                         <div class="order-product-info">
@@ -1459,7 +1554,21 @@ async function loadOrders() {
             `;
         });
         
-        ordersContainer.innerHTML = html;
+        const loadMore = document.getElementById('orders-load-more');
+        if (loadMore) loadMore.remove();
+        
+        if (after) {
+            ordersContainer.insertAdjacentHTML('beforeend', html);
+        } else {
+            ordersContainer.innerHTML = html;
+        }
+        
+        if (data.next_cursor) {
+            ordersContainer.insertAdjacentHTML('beforeend',
+                '<button class="btn btn-outline btn-block" id="orders-load-more">Load more orders</button>');
+            document.getElementById('orders-load-more')
+                .addEventListener('click', () => loadOrders(data.next_cursor));
+        }
     } catch (error) {
         console.error('Load orders error:', error);
         document.getElementById('orders-container').innerHTML = `
@@ -1501,6 +1610,13 @@ async function processPayment() {
     showLoading(true);
     
     try {
+        // Queued and in-flight cart edits must all be on the server first;
+        // never place an order against a cart the user did not see
+        if (!await flushCartOperations()) {
+            showNotification('Your cart could not be updated. Please review it and try again.', 'error');
+            return;
+        }
+        
         const response = await fetch(`${API_BASE}/api/orders`, {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
@@ -1657,16 +1773,6 @@ function showLoading(show) {
     }
 }
 
-function loadInitialData() {
-    console.log("Loading initial data...");
-    
-    // Load deals on page load
-    loadDealsProducts();
-    
-    // Load smartphones by default
-    loadCategoryProducts('Smartphones');
-}
-
 // Global functions for onclick handlers
 window.addToCart = addToCart;
 window.addToWishlist = addToWishlist;
@@ -0,0 +1,67 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class UserSummaryCache:
+    """Small LRU + TTL cache of per-user profile and cart/wishlist counts.
+
+    Entries are dropped explicitly by the handlers that change a user's cart,
+    wishlist or profile. The TTL bounds staleness for changes made in other
+    worker processes, which this in-process cache cannot see.
+
+    A miss that reads the database takes ``version(user_id)`` first and
+    passes it to ``set()``; if the user was invalidated in between, the
+    possibly stale summary is not stored.
+    """
+
+    def __init__(self, maxsize=10000, ttl=30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        # user_id -> stamp of its last invalidation, bounded like the entries;
+        # _floor is the newest stamp dropped from it
+        self._clock = 0
+        self._invalidated = OrderedDict()
+        self._floor = 0
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def version(self, user_id):
+        """Invalidation version to hand to set(); take it before reading the database"""
+        with self._lock:
+            return self._invalidated.get(user_id, self._floor)
+
+    def set(self, user_id, summary, version=None):
+        with self._lock:
+            if version is not None and self._invalidated.get(user_id, self._floor) != version:
+                return
+            self._entries[user_id] = (time.monotonic() + self.ttl, summary)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+            self._clock += 1
+            self._invalidated[user_id] = self._clock
+            self._invalidated.move_to_end(user_id)
+            while len(self._invalidated) > self.maxsize:
+                self._floor = self._invalidated.popitem(last=False)[1]
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}